@@ -0,0 +1,57 @@
+"""Local HTTP stand-in for the Brave images search endpoint."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeBraveServer:
+    """Serves /res/v1/images/search with deterministic results after a fixed latency."""
+
+    def __init__(self, latency: float = 0.15, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query).get("q", [""])[0]
+                count = int(parse_qs(url.query).get("count", ["1"])[0])
+                server.requests += 1
+                time.sleep(server.latency)
+                body = json.dumps({
+                    "results": [
+                        {"title": query, "properties": {"url": f"https://images.example.com/{index}/{query.replace(' ', '-')}.jpg"}}
+                        for index in range(count)
+                    ]
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/res/v1/images/search"
+
+    def __enter__(self) -> "FakeBraveServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,106 @@
+"""Deterministic stand-in for Gemini that replays recorded agent turns."""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Callable, Optional, Union
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from tutor_agent.runtime.context_cache import apply_context_cache
+from tutor_agent.runtime.prompts import content_tokens, estimate_tokens
+
+# A value in a recorded step may be computed from the user message, e.g. to make queries unique.
+Dynamic = Union[str, dict, Callable[[str], Union[str, dict]]]
+
+
+@dataclass
+class Step:
+    """One recorded model turn: either a function call or the final text."""
+    text: Optional[Dynamic] = None
+    function_name: Optional[str] = None
+    function_args: Dynamic = field(default_factory=dict)
+
+
+def _resolve(value: Dynamic, user_text: str):
+    return value(user_text) if callable(value) else value
+
+
+class ScriptedLlm(BaseLlm):
+    """Replays a fixed sequence of steps with a configurable latency.
+
+    The step to replay is derived from the request itself: after the function response of step N
+    the model answers with step N + 1, otherwise it starts with the first step. With a
+    `LocalContextCache` the static prompt prefix is read from the cache like Gemini would.
+    """
+
+    model: str = "fake-gemini"
+    steps: list[Step]
+    first_token_latency: float = 0.2
+    token_latency: float = 0.002
+    stream_chunk_tokens: int = 16
+    context_cache: Optional[Any] = None
+    prompt_tokens_sent: int = 0
+    cached_tokens_read: int = 0
+
+    def _next_step(self, llm_request: LlmRequest) -> Step:
+        last = llm_request.contents[-1] if llm_request.contents else None
+        responded = {part.function_response.name for part in (last.parts if last else []) if part.function_response}
+        for index, step in enumerate(self.steps[:-1]):
+            if step.function_name in responded:
+                return self.steps[index + 1]
+        return self.steps[0]
+
+    @staticmethod
+    def _user_text(llm_request: LlmRequest) -> str:
+        # The original request: the later user-role contents of a sub-agent are ADK's "For context:"
+        # rewrites of the other agents' events.
+        for content in llm_request.contents:
+            if content.role == "user":
+                texts = [part.text for part in content.parts or [] if part.text]
+                if texts:
+                    return "".join(texts)
+        return ""
+
+    async def generate_content_async(
+            self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.context_cache is not None:
+            await apply_context_cache(llm_request, self.context_cache)
+        step = self._next_step(llm_request)
+        user_text = self._user_text(llm_request)
+        config = llm_request.config
+        instruction = config.system_instruction if config and isinstance(config.system_instruction, str) else ""
+        prompt_tokens = estimate_tokens(instruction) + sum(content_tokens(content) for content in llm_request.contents)
+        cached_tokens = 0
+        if config and config.cached_content:
+            cached_tokens = estimate_tokens(self.context_cache.resolve(config.cached_content).system_instruction)
+        self.prompt_tokens_sent += prompt_tokens
+        self.cached_tokens_read += cached_tokens
+        usage = {"prompt_tokens": prompt_tokens, "cached_tokens": cached_tokens}
+        await asyncio.sleep(self.first_token_latency)
+
+        if step.function_name:
+            call = types.FunctionCall(name=step.function_name, args=_resolve(step.function_args, user_text))
+            await asyncio.sleep(self.token_latency * estimate_tokens(str(call.args)))
+            yield LlmResponse(
+                content=types.Content(role="model", parts=[types.Part(function_call=call)]),
+                custom_metadata={"usage": {**usage, "output_tokens": estimate_tokens(str(call.args))}},
+            )
+            return
+
+        text = _resolve(step.text, user_text)
+        if stream:
+            chunk_size = self.stream_chunk_tokens * 4
+            for start in range(0, len(text), chunk_size):
+                chunk = text[start:start + chunk_size]
+                await asyncio.sleep(self.token_latency * estimate_tokens(chunk))
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+        else:
+            await asyncio.sleep(self.token_latency * estimate_tokens(text))
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            custom_metadata={"usage": {**usage, "output_tokens": estimate_tokens(text)}},
+        )
@@ -0,0 +1,104 @@
+"""Recorded agent turns replayed by the benchmark's fake model."""
+
+import json
+import re
+
+from .fake_llm import Step
+
+_WORDS = (
+    "learning structure concept example practice memory recall principle history method design "
+    "pattern theory model system process technique skill context application review"
+).split()
+
+
+def _text(words: int, seed: int) -> str:
+    return " ".join(_WORDS[(seed * 7 + index) % len(_WORDS)] for index in range(words))
+
+
+def _request_id(user_text: str) -> str:
+    match = re.search(r"#(\d+)", user_text)
+    return match.group(1) if match else "0"
+
+
+def topic_json(sections: int = 6, subtopics: int = 5) -> str:
+    return json.dumps({
+        "title": "I want to learn how to design user interfaces",
+        "subject": "Design",
+        "sections": [
+            {
+                "title": f"Section {section}",
+                "imageUrl": "https://images.example.com/section.jpg",
+                "subtopics": [
+                    {"title": f"Subtopic {section}.{subtopic}", "summary": _text(40, section + subtopic)}
+                    for subtopic in range(subtopics)
+                ],
+            }
+            for section in range(sections)
+        ],
+    }, indent=2)
+
+
+def material_json(blocks: int = 5, words: int = 350) -> str:
+    return json.dumps({
+        "title": "Pablo Picasso and the Birth of Cubism",
+        "summary": _text(30, 1),
+        "material": [
+            {
+                "text": _text(words, block),
+                "imageUrl": "https://images.example.com/block.jpg",
+                "imageDescription": _text(20, block),
+            }
+            for block in range(blocks)
+        ],
+        "references": ["https://en.wikipedia.org/wiki/Pablo_Picasso"],
+    }, indent=2)
+
+
+def game_json(pairs: int = 8) -> str:
+    return json.dumps({
+        "game": "memory_tiles",
+        "subtopic": "Pablo Picasso and the Birth of Cubism",
+        "title": "Cubism Memory Tiles",
+        "description": _text(20, 3),
+        "rules": [_text(10, rule) for rule in range(3)],
+        "pairs": [{"term": _text(3, pair), "definition": _text(12, pair)} for pair in range(pairs)],
+        "previewSeconds": 4,
+        "roundSeconds": 90,
+        "mismatchPenalty": 2,
+    })
+
+
+def _batch_queries(prefix: str, count: int):
+    return lambda user_text: {"queries": [f"{prefix} {index} request {_request_id(user_text)}" for index in range(count)]}
+
+
+def transfer(agent_name: str) -> list[Step]:
+    return [Step(function_name="transfer_to_agent", function_args={"agent_name": agent_name})]
+
+
+SCENARIOS = {
+    "topic": {
+        "agent": "topic_creator_agent",
+        "request": "I want to learn how to design user interfaces #{id}",
+        "steps": [
+            Step(function_name="search_brave_images_batch", function_args=_batch_queries("ui design section", 6)),
+            Step(text=topic_json()),
+        ],
+    },
+    "materials": {
+        "agent": "edu_materials_agent",
+        "request": 'Topic: "Modern Art"\nSection: "Cubism"\nSubtopic: "Pablo Picasso and the Birth of Cubism" #{id}',
+        "steps": [
+            Step(function_name="search_brave_images_batch", function_args=_batch_queries("picasso cubism block", 5)),
+            Step(text=material_json()),
+        ],
+    },
+    "game": {
+        "agent": "edu_game_developer",
+        "request": "Create a game for the subtopic Pablo Picasso and the Birth of Cubism #{id}",
+        "steps": [
+            Step(function_name="get_gameplay_ideas"),
+            Step(text=game_json()),
+        ],
+    },
+}
@@ -0,0 +1,149 @@
+"""Latency/throughput benchmark of the agent tree against a fake Gemini model and a fake Brave server.
+
+Usage (from the `agents` directory):
+
+    python -m benchmarks.run --scenarios topic,materials,game --concurrency 1,4,16 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+from .fake_brave import FakeBraveServer
+from .fake_llm import ScriptedLlm
+from .recordings import SCENARIOS, transfer
+
+
+def percentile(values: list[float], q: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def configure_models(
+        root_agent, scenario: dict, first_token_latency: float, token_latency: float, context_cache=None
+) -> list[ScriptedLlm]:
+    """Points the root agent and the scenario's sub-agent at scripted fake models."""
+    def fake(steps) -> ScriptedLlm:
+        return ScriptedLlm(steps=steps, first_token_latency=first_token_latency, token_latency=token_latency,
+                           context_cache=context_cache)
+
+    root_agent.model = fake(transfer(scenario["agent"]))
+    root_agent.find_agent(scenario["agent"]).model = fake(scenario["steps"])
+    return [root_agent.model, root_agent.find_agent(scenario["agent"]).model]
+
+
+async def run_request(runner, app_name: str, text: str) -> dict:
+    from google.genai import types
+
+    session = runner.session_service.create_session(app_name=app_name, user_id="bench", session_id=uuid.uuid4().hex)
+    message = types.Content(role="user", parts=[types.Part(text=text)])
+    tool_calls = 0
+    started = time.perf_counter()
+    try:
+        async for event in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+            tool_calls += sum(1 for call in event.get_function_calls() if call.name != "transfer_to_agent")
+        error = None
+    except Exception as e:
+        error = repr(e)
+    finally:
+        runner.session_service.delete_session(app_name=app_name, user_id="bench", session_id=session.id)
+    return {"latency": time.perf_counter() - started, "tool_calls": tool_calls, "error": error}
+
+
+async def run_level(runner, app_name: str, scenario: dict, concurrency: int, requests: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    offset = uuid.uuid4().int % 1_000_000
+
+    async def one(index: int) -> dict:
+        async with semaphore:
+            return await run_request(runner, app_name, scenario["request"].format(id=offset + index))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies = [result["latency"] * 1000 for result in results if not result["error"]]
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": sum(1 for result in results if result["error"]),
+        "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else None,
+        "requests_per_second": round(requests / elapsed, 2),
+        "tool_calls_per_request": round(statistics.fmean(result["tool_calls"] for result in results), 2),
+        "sample_error": next((result["error"] for result in results if result["error"]), None),
+    }
+
+
+async def main(args: argparse.Namespace, brave: FakeBraveServer) -> dict:
+    from google.adk.runners import InMemoryRunner
+    from tutor_agent.agent import root_agent
+    from tutor_agent.runtime.context_cache import LocalContextCache
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": dict(vars(args)),
+        "results": [],
+    }
+    for name in args.scenarios.split(","):
+        scenario = SCENARIOS[name]
+        models = configure_models(root_agent, scenario, args.first_token_latency, args.token_latency,
+                                  LocalContextCache() if args.context_cache else None)
+        runner = InMemoryRunner(agent=root_agent, app_name="bench")
+        for concurrency in (int(level) for level in args.concurrency.split(",")):
+            brave_before = brave.requests
+            tokens_before = [(model.prompt_tokens_sent, model.cached_tokens_read) for model in models]
+            level = await run_level(runner, "bench", scenario, concurrency, args.requests or concurrency * 4)
+            level["scenario"] = name
+            level["brave_requests"] = brave.requests - brave_before
+            level["prompt_tokens_per_request"] = round(sum(
+                model.prompt_tokens_sent - before[0] for model, before in zip(models, tokens_before)
+            ) / level["requests"], 1)
+            level["cached_prompt_tokens_per_request"] = round(sum(
+                model.cached_tokens_read - before[1] for model, before in zip(models, tokens_before)
+            ) / level["requests"], 1)
+            report["results"].append(level)
+            print(json.dumps(level))
+    return report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=0, help="Requests per level (default: 4x concurrency).")
+    parser.add_argument("--first-token-latency", type=float, default=0.2, help="Seconds before the first token.")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="Seconds per output token.")
+    parser.add_argument("--brave-latency", type=float, default=0.15, help="Seconds per fake Brave request.")
+    parser.add_argument("--context-cache", action="store_true",
+                        help="Serve the static prompt prefixes from a local stand-in of the Gemini context cache.")
+    parser.add_argument("--output", default="benchmark_results.json")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    cache_dir = tempfile.mkdtemp(prefix="learnie-bench-")
+    with FakeBraveServer(latency=args.brave_latency) as brave:
+        # Must be set before tutor_agent is imported: the tools read them from the environment.
+        os.environ.update({
+            "BRAVE_IMAGES_URL": brave.url,
+            "BRAVE_API_KEY": "benchmark",
+            "IMAGE_CACHE_PATH": os.path.join(cache_dir, "images.sqlite3"),
+            "GENERATION_CACHE_PATH": os.path.join(cache_dir, "generations.sqlite3"),
+            # The fake server has no quota; measure the agents, not the rate limiter.
+            "BRAVE_REQUESTS_PER_MINUTE": os.environ.get("BRAVE_REQUESTS_PER_MINUTE", "0"),
+        })
+        report = asyncio.run(main(args, brave))
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}")
@@ -0,0 +1,110 @@
+"""Cold-start benchmark: import time of the tutor_agent modules, measured with `python -X importtime`.
+
+Every target is imported in a fresh interpreter (best of `--repeat` runs). The report lists the total
+import time, the time spent in tutor_agent's own modules and the slowest imports; the run fails with
+exit code 1 when a target exceeds its budget.
+
+Usage (from the `agents` directory):
+
+    python -m benchmarks.startup --budget tutor_agent=0.1,tutor_agent.agent=5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+
+PACKAGE = "tutor_agent"
+DEFAULT_BUDGETS = "tutor_agent=0.1,tutor_agent.runtime.api=5,tutor_agent.agent=5"
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """(module, self microseconds, cumulative microseconds) of every `-X importtime` line."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def measure(module: str) -> list[tuple[str, int, int]]:
+    environment = {**os.environ, "PYTHONWARNINGS": "ignore"}
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=environment, check=False,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{process.stderr[-2000:]}")
+    return parse_importtime(process.stderr)
+
+
+def summarize(module: str, imports: list[tuple[str, int, int]], top: int) -> dict:
+    by_package: dict[str, int] = defaultdict(int)
+    for name, self_us, _ in imports:
+        parts = name.split(".")
+        by_package[".".join(parts[:2]) if parts[0] == "google" else parts[0]] += self_us
+    own = [(name, self_us) for name, self_us, _ in imports if name.split(".")[0] == PACKAGE]
+    return {
+        "module": module,
+        "total_ms": round(next(cumulative for name, _, cumulative in reversed(imports) if name == module) / 1000, 2),
+        "own_ms": round(sum(self_us for _, self_us in own) / 1000, 2),
+        "agents_built": any(name == f"{PACKAGE}.agent" for name, _, _ in imports),
+        "slowest_packages_ms": {
+            name: round(self_us / 1000, 2)
+            for name, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]
+        },
+        "slowest_own_modules_ms": {
+            name: round(self_us / 1000, 2) for name, self_us in sorted(own, key=lambda item: -item[1])[:top]
+        },
+    }
+
+
+def parse_budgets(text: str) -> dict[str, float]:
+    return {module: float(seconds) for module, seconds in (item.split("=") for item in text.split(",") if item)}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", default=DEFAULT_BUDGETS,
+                        help="Comma-separated module=seconds import budgets; the modules are the benchmark targets.")
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per target, the fastest one is reported.")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest packages and modules to report.")
+    parser.add_argument("--output", default="startup_results.json")
+    return parser.parse_args()
+
+
+def main(args: argparse.Namespace) -> int:
+    budgets = parse_budgets(args.budget)
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": dict(vars(args)),
+        "results": [],
+    }
+    failed = []
+    for module, budget in budgets.items():
+        runs = [summarize(module, measure(module), args.top) for _ in range(args.repeat)]
+        result = min(runs, key=lambda run: run["total_ms"])
+        result["budget_ms"] = budget * 1000
+        result["passed"] = result["total_ms"] <= result["budget_ms"]
+        if not result["passed"]:
+            failed.append(module)
+        report["results"].append(result)
+        print(json.dumps(result))
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}")
+    if failed:
+        print(f"Import time over budget: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
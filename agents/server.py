@@ -0,0 +1,346 @@
+"""ASGI server running the tutor agent tree on plain hosts, with several worker processes.
+
+Sessions are kept by a pluggable ADK session service: in memory (one worker only) or in any SQLAlchemy
+database (e.g. SQLite in WAL mode), so that every worker can serve every session. A turn holds a lease
+on its session in that database, so the turns of a session run one at a time across all workers and
+hosts sharing it.
+
+On SIGTERM `/readyz` answers 503 for `--drain-notice-seconds` while the requests are still served, so
+that load balancers stop sending new ones; then uvicorn stops accepting connections, lets in-flight
+turns finish for up to `--drain-seconds` and the background work is cancelled.
+
+ADK's runner writes every event of a turn with the synchronous `append_event` of the session service,
+so with a database each write blocks the worker's event loop; add workers rather than concurrency per
+worker when the database is slow.
+
+Usage (from the `agents` directory):
+
+    python server.py --workers 4 --session-db sqlite:///sessions.sqlite3
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import random
+import signal
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from typing import Any, Callable, Optional, TypeVar
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.adk.sessions import BaseSessionService, DatabaseSessionService, InMemorySessionService, Session
+from google.genai import types
+from pydantic import BaseModel
+from sqlalchemy import Column, Engine, Float, MetaData, String, Table, delete, insert, update
+from sqlalchemy.exc import DatabaseError, IntegrityError
+
+from tutor_agent.registry import get_root_agent
+from tutor_agent.runtime.api import SSE_HEADERS, router
+from tutor_agent.runtime.prefetch import cancel_all_prefetches, cancel_prefetch
+from tutor_agent.runtime.streaming import format_sse
+from tutor_agent.tools.brave_search_tools import close_brave_client
+from tutor_agent.tools.image_proxy import close_image_client
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+APP_NAME = "tutor_agent"
+DEFAULT_DRAIN_SECONDS = 30.0
+DEFAULT_DRAIN_NOTICE_SECONDS = 5.0
+# A lease not renewed for this long (e.g. its worker crashed) may be taken over.
+LEASE_SECONDS = 60.0
+LEASE_POLL_SECONDS = 0.1
+
+_leases = Table(
+    "learnie_session_leases",
+    MetaData(),
+    Column("key", String(512), primary_key=True),
+    Column("token", String(32), nullable=False),
+    Column("expires_at", Float, nullable=False),
+)
+
+
+def _create_schema(create: Callable[[], T]) -> T:
+    # Workers starting together race to create the tables; the losers see them on their second try.
+    try:
+        return create()
+    except DatabaseError as e:
+        logger.info("Retrying the schema creation: %s", e)
+        time.sleep(random.uniform(0.1, 0.5))
+        return create()
+
+
+def create_session_service(url: str) -> BaseSessionService:
+    """Session service for a database URL; "" or "memory" keeps the sessions in this process only."""
+    if url in ("", "memory"):
+        return InMemorySessionService()
+    if url.startswith("sqlite:///"):
+        # WAL lets the workers read while one of them writes; the mode is stored in the database file.
+        path = url[len("sqlite:///"):]
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with contextlib.closing(sqlite3.connect(path)) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+    return _create_schema(lambda: DatabaseSessionService(url))
+
+
+class SessionLeases:
+    """Cross-process session locks, as rows of the session database.
+
+    A holder renews its lease while it runs; an expired lease is taken over by the next caller.
+    """
+
+    def __init__(self, engine: Engine, ttl_seconds: float = LEASE_SECONDS):
+        self.engine = engine
+        self.ttl_seconds = ttl_seconds
+        _create_schema(lambda: _leases.metadata.create_all(engine))
+
+    def _try_acquire(self, key: str, token: str) -> bool:
+        now = time.time()
+        with self.engine.begin() as connection:
+            connection.execute(delete(_leases).where(_leases.c.key == key, _leases.c.expires_at < now))
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(insert(_leases).values(key=key, token=token, expires_at=now + self.ttl_seconds))
+        except IntegrityError:
+            return False
+        return True
+
+    def _renew(self, key: str, token: str) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(_leases).where(_leases.c.key == key, _leases.c.token == token)
+                .values(expires_at=time.time() + self.ttl_seconds)
+            )
+
+    def _release(self, key: str, token: str) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(delete(_leases).where(_leases.c.key == key, _leases.c.token == token))
+
+    async def _keep_renewed(self, key: str, token: str) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            await asyncio.to_thread(self._renew, key, token)
+
+    @contextlib.asynccontextmanager
+    async def hold(self, key: str):
+        """Waits for the lease of `key` and holds it for the duration of the block."""
+        token = uuid.uuid4().hex
+        while not await asyncio.to_thread(self._try_acquire, key, token):
+            await asyncio.sleep(LEASE_POLL_SECONDS)
+        renewal = asyncio.create_task(self._keep_renewed(key, token))
+        try:
+            yield
+        finally:
+            renewal.cancel()
+            await asyncio.to_thread(self._release, key, token)
+
+
+@contextlib.contextmanager
+def drain_notice(app: FastAPI, seconds: float):
+    """Marks the app as draining as soon as SIGTERM arrives and hands the signal to uvicorn `seconds` later.
+
+    uvicorn closes the listener as soon as it sees the signal, so without the delay `/readyz` couldn't
+    tell load balancers to stop routing new requests first. Other signals (e.g. Ctrl+C) are handed over
+    at once. Signals can only be handled in the main thread; elsewhere (e.g. tests) this does nothing.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    loop = asyncio.get_running_loop()
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def forward(signum: int) -> None:
+        if callable(previous):
+            previous(signum, None)
+
+    def on_sigterm(signum, frame) -> None:
+        if app.state.draining:
+            forward(signum)
+            return
+        app.state.draining = True
+        logger.info("Draining: not ready, stopping in %.1fs", seconds)
+        loop.call_soon_threadsafe(loop.call_later, seconds, forward, signum)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+
+class CreateSessionRequest(BaseModel):
+    session_id: Optional[str] = None
+    state: Optional[dict[str, Any]] = None
+
+
+class RunRequest(BaseModel):
+    message: str
+
+
+def _session_json(session: Session) -> dict:
+    return session.model_dump(mode="json", exclude_none=True, by_alias=True)
+
+
+def create_app(
+        session_db: Optional[str] = None,
+        drain_notice_seconds: Optional[float] = None,
+) -> FastAPI:
+    """Builds the app; the arguments default to the SESSION_DB_URL and DRAIN_NOTICE_SECONDS environment variables."""
+    session_db = os.environ.get("SESSION_DB_URL", "") if session_db is None else session_db
+    if drain_notice_seconds is None:
+        drain_notice_seconds = float(os.environ.get("DRAIN_NOTICE_SECONDS", DEFAULT_DRAIN_NOTICE_SECONDS))
+    # Turns of a session waiting in this worker queue here rather than polling the database.
+    session_locks: weakref.WeakValueDictionary[tuple[str, str], asyncio.Lock] = weakref.WeakValueDictionary()
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: FastAPI):
+        session_service = app.state.session_service = create_session_service(session_db)
+        app.state.leases = (
+            SessionLeases(session_service.db_engine) if isinstance(session_service, DatabaseSessionService) else None
+        )
+        # Built at startup, so the first request of every worker doesn't pay for it.
+        app.state.runner = Runner(app_name=APP_NAME, agent=get_root_agent(), session_service=session_service)
+        app.state.draining = False
+        with drain_notice(app, drain_notice_seconds):
+            yield
+        # uvicorn has already waited for the in-flight requests.
+        app.state.draining = True
+        cancel_all_prefetches()
+        await close_brave_client()
+        await close_image_client()
+
+    app = FastAPI(title="Learnie tutor agent", lifespan=lifespan)
+    app.include_router(router)
+
+    async def get_session(user_id: str, session_id: str) -> Session:
+        session = await asyncio.to_thread(
+            app.state.session_service.get_session, app_name=APP_NAME, user_id=user_id, session_id=session_id
+        )
+        if session is None:
+            raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
+        return session
+
+    @contextlib.asynccontextmanager
+    async def session_lock(user_id: str, session_id: str):
+        """Runs the block as the only turn of the session, in this worker and in all others sharing the database."""
+        lock = session_locks.get((user_id, session_id))
+        if lock is None:
+            lock = session_locks[(user_id, session_id)] = asyncio.Lock()
+        async with lock:
+            if app.state.leases is None:
+                yield
+                return
+            async with app.state.leases.hold(f"{APP_NAME}/{user_id}/{session_id}"):
+                yield
+
+    @app.get("/healthz")
+    async def healthz() -> dict:
+        return {"status": "ok"}
+
+    @app.get("/readyz")
+    async def readyz() -> dict:
+        if getattr(app.state, "draining", True):
+            raise HTTPException(status_code=503, detail="Not ready")
+        return {"status": "ready"}
+
+    @app.post("/users/{user_id}/sessions")
+    async def create_session(user_id: str, body: CreateSessionRequest) -> dict:
+        session = await asyncio.to_thread(
+            app.state.session_service.create_session,
+            app_name=APP_NAME, user_id=user_id, state=body.state, session_id=body.session_id or uuid.uuid4().hex,
+        )
+        return _session_json(session)
+
+    @app.get("/users/{user_id}/sessions/{session_id}")
+    async def read_session(user_id: str, session_id: str) -> dict:
+        return _session_json(await get_session(user_id, session_id))
+
+    @app.delete("/users/{user_id}/sessions/{session_id}", status_code=204)
+    async def delete_session(user_id: str, session_id: str) -> None:
+        await asyncio.to_thread(
+            app.state.session_service.delete_session, app_name=APP_NAME, user_id=user_id, session_id=session_id
+        )
+        cancel_prefetch(session_id)
+
+    async def run_turn(user_id: str, session_id: str, message: str, run_config: RunConfig):
+        await get_session(user_id, session_id)
+        content = types.Content(role="user", parts=[types.Part(text=message)])
+        async with session_lock(user_id, session_id):
+            async for event in app.state.runner.run_async(
+                user_id=user_id, session_id=session_id, new_message=content, run_config=run_config
+            ):
+                yield event
+
+    @app.post("/users/{user_id}/sessions/{session_id}/run")
+    async def run(user_id: str, session_id: str, body: RunRequest) -> list[dict]:
+        """Runs one turn and returns all of its events."""
+        return [
+            event.model_dump(mode="json", exclude_none=True, by_alias=True)
+            async for event in run_turn(user_id, session_id, body.message, RunConfig())
+        ]
+
+    @app.post("/users/{user_id}/sessions/{session_id}/run/stream")
+    async def run_stream(user_id: str, session_id: str, body: RunRequest) -> StreamingResponse:
+        """Runs one turn and streams its events, partial model text included, as server-sent events."""
+        await get_session(user_id, session_id)
+
+        async def events():
+            try:
+                async for event in run_turn(user_id, session_id, body.message, RunConfig(streaming_mode=StreamingMode.SSE)):
+                    yield format_sse("event", event.model_dump_json(exclude_none=True, by_alias=True))
+            except Exception as e:
+                logger.exception("Turn failed in session %s", session_id)
+                yield format_sse("error", {"message": str(e)})
+                return
+            yield format_sse("done", {})
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    return app
+
+
+app = create_app()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", "1")))
+    parser.add_argument("--session-db", default=os.environ.get("SESSION_DB_URL", ""),
+                        help='SQLAlchemy URL of the session store, e.g. "sqlite:///sessions.sqlite3"; empty keeps them in memory.')
+    parser.add_argument("--drain-seconds", type=float, default=float(os.environ.get("DRAIN_SECONDS", DEFAULT_DRAIN_SECONDS)),
+                        help="How long in-flight turns may finish once the server stops accepting connections.")
+    parser.add_argument("--drain-notice-seconds", type=float,
+                        default=float(os.environ.get("DRAIN_NOTICE_SECONDS", DEFAULT_DRAIN_NOTICE_SECONDS)),
+                        help="How long /readyz answers 503 after SIGTERM before the server stops accepting connections.")
+    parser.add_argument("--log-level", default="info")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.workers > 1 and args.session_db in ("", "memory"):
+        raise SystemExit("In-memory sessions can't be shared by several workers, pass --session-db.")
+    # The worker processes import this module again and build their app from the environment.
+    os.environ["SESSION_DB_URL"] = args.session_db
+    os.environ["DRAIN_NOTICE_SECONDS"] = str(args.drain_notice_seconds)
+    uvicorn.run(
+        "server:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+        timeout_graceful_shutdown=int(args.drain_seconds),
+    )
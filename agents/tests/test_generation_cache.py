@@ -0,0 +1,24 @@
+from google.adk.agents import Agent
+
+from tutor_agent.runtime.generation_cache import generation_key
+
+AGENT = Agent(name="topic_creator_agent", model="gemini-2.0-flash", instruction="Create a topic.")
+
+
+def test_punctuation_distinguishes_inputs():
+    keys = {generation_key(AGENT, text) for text in (
+        "I want to learn C++", "I want to learn C", "I want to learn C#", "I want to learn C!",
+    )}
+    assert len(keys) == 4
+
+
+def test_case_unicode_forms_and_whitespace_share_a_key():
+    key = generation_key(AGENT, "I want to learn C++")
+    assert generation_key(AGENT, "  i WANT to\nlearn   c++ ") == key
+    # Fullwidth plus signs are NFKC-equivalent to "+".
+    assert generation_key(AGENT, "I want to learn C\uff0b\uff0b") == key
+
+
+def test_instruction_is_part_of_the_key():
+    edited = AGENT.model_copy(update={"instruction": "Create a detailed topic."})
+    assert generation_key(edited, "Learn C") != generation_key(AGENT, "Learn C")
@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+from google.adk.agents import Agent
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from tutor_agent.runtime import instrumentation
+from tutor_agent.runtime.prompts import estimate_tokens
+
+
+def _request() -> LlmRequest:
+    return LlmRequest(
+        model="gemini-2.0-flash",
+        contents=[types.Content(role="user", parts=[types.Part(text="A long earlier material. " * 200)])],
+        config=types.GenerateContentConfig(system_instruction="Teach."),
+    )
+
+
+def _run(monkeypatch, callback) -> tuple:
+    """Runs the instrumented before_model_callback, returns its result and the prompt tokens it started with."""
+    agent = Agent(name="compacting_agent", model="gemini-2.0-flash", instruction="Teach.",
+                  before_model_callback=callback)
+    instrumentation.instrument(agent)
+    started = []
+    monkeypatch.setattr(instrumentation._models, "start", lambda key, name, labels, data=None: started.append(data))
+    context = SimpleNamespace(agent_name=agent.name, invocation_id="invocation")
+    result = agent.before_model_callback(callback_context=context, llm_request=_request())
+    return result, started
+
+
+def test_prompt_tokens_are_counted_after_the_agent_callback(monkeypatch):
+    def compact(callback_context, llm_request):
+        llm_request.contents = []
+
+    assert _run(monkeypatch, compact) == (None, [estimate_tokens("Teach.")])
+
+
+def test_short_circuited_request_is_not_a_model_call(monkeypatch):
+    def answer(callback_context, llm_request):
+        return LlmResponse(content=types.Content(role="model", parts=[types.Part(text="cached")]))
+
+    result, started = _run(monkeypatch, answer)
+    assert result.content.parts[0].text == "cached"
+    assert started == []
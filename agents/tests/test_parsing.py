@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from pydantic import BaseModel
+
+from tutor_agent.runtime import parsing
+from tutor_agent.runtime.parsing import AgentOutputError, parse_agent_output, repair_json
+
+
+class Card(BaseModel):
+    title: str
+    tags: list[str] = []
+
+
+def _repaired(text: str):
+    return json.loads(repair_json(text))
+
+
+def test_bare_keys_are_quoted():
+    assert _repaired('{title: "Cubism", tags: ["art"], done: True, next: None}') == {
+        "title": "Cubism", "tags": ["art"], "done": True, "next": None,
+    }
+
+
+def test_non_ascii_bare_keys_are_quoted():
+    assert _repaired("{éclair: 1}") == {"éclair": 1}
+    assert _repaired('{"a": 1, ключ: 2, 名前: "x"}') == {"a": 1, "ключ": 2, "名前": "x"}
+
+
+def test_inner_quotes_are_escaped():
+    assert _repaired('{"title": "The "Starry Night" by Van Gogh", "tags": ["a "b", c"]}') == {
+        "title": 'The "Starry Night" by Van Gogh', "tags": ['a "b", c'],
+    }
+
+
+def test_trailing_commas_are_removed():
+    assert _repaired('{"tags": ["a", "b",], "title": "x", // done\n}') == {"tags": ["a", "b"], "title": "x"}
+    assert _repaired('{"url": "https://example.com/a", /* note */ "b": 1,}') == {"url": "https://example.com/a", "b": 1}
+
+
+def test_fences_and_prose_are_stripped():
+    assert _repaired('```json\n{"title": "x"}\n```') == {"title": "x"}
+    assert _repaired('Here is the card:\n{"title": "x"}\nEnjoy!') == {"title": "x"}
+
+
+def test_truncated_output_is_closed():
+    assert _repaired('{"title": "x", "tags": ["a", "b') == {"title": "x", "tags": ["a", "b"]}
+
+
+def test_parse_agent_output_repairs_almost_json():
+    assert parse_agent_output("```json\n{title: 'Café', tags: ['a',],}\n```", Card) == Card(title="Café", tags=["a"])
+
+
+def test_parse_agent_output_raises_on_unrecoverable_output():
+    with pytest.raises(AgentOutputError) as error:
+        parse_agent_output('{"tags": ["a"]}', Card)
+    assert error.value.text == '{"tags": ["a"]}'
+
+
+def test_repair_failures_become_agent_output_errors(monkeypatch):
+    def fail(text):
+        raise AttributeError("'NoneType' object has no attribute 'group'")
+
+    monkeypatch.setattr(parsing, "repair_json", fail)
+    with pytest.raises(AgentOutputError):
+        parse_agent_output("{title: x", Card)
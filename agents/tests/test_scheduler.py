@@ -0,0 +1,131 @@
+import asyncio
+import heapq
+import itertools
+
+import pytest
+
+from tutor_agent.runtime import scheduler
+from tutor_agent.runtime.scheduler import BACKGROUND, INTERACTIVE, SharedLane, TokenBucketScheduler, lane
+
+
+class FakeClock:
+    """Virtual time for the scheduler: sleeping callers wake up in order once everything else is blocked."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._sleepers: list = []
+        self._order = itertools.count()
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self.now + seconds, next(self._order), future))
+        await future
+
+    async def run(self, *coroutines):
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        while not all(task.done() for task in tasks):
+            for _ in range(20):
+                await asyncio.sleep(0)
+            if self._sleepers and not all(task.done() for task in tasks):
+                wake, _, future = heapq.heappop(self._sleepers)
+                self.now = max(self.now, wake)
+                future.set_result(None)
+        return [task.result() for task in tasks]
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler, "time", clock)
+    monkeypatch.setattr(scheduler, "asyncio", clock)
+    return clock
+
+
+def _schedule(clock: FakeClock, granted: list, upstream: TokenBucketScheduler):
+    async def call(name: str, lane_name=INTERACTIVE) -> None:
+        with lane(lane_name):
+            await upstream.acquire()
+        granted.append((name, clock.now))
+
+    return call
+
+
+def test_interactive_calls_are_served_before_background_calls(clock):
+    upstream = TokenBucketScheduler("test", requests_per_minute=60, burst=1)
+    granted = []
+    call = _schedule(clock, granted, upstream)
+
+    asyncio.run(clock.run(
+        call("first"), call("background 1", BACKGROUND), call("background 2", BACKGROUND), call("interactive"),
+    ))
+
+    assert [name for name, _ in granted] == ["first", "interactive", "background 1", "background 2"]
+    assert [at for _, at in granted] == pytest.approx([0.0, 1.0, 2.0, 3.0])
+
+
+def test_promoted_shared_lane_moves_ahead_of_background_calls(clock):
+    upstream = TokenBucketScheduler("test", requests_per_minute=60, burst=1)
+    granted = []
+    call = _schedule(clock, granted, upstream)
+    shared = SharedLane(BACKGROUND)
+
+    async def interactive_caller_joins():
+        await clock.sleep(0.5)
+        shared.join(INTERACTIVE)
+        await call("interactive")
+
+    asyncio.run(clock.run(
+        call("first"), call("background", BACKGROUND), call("shared", shared), interactive_caller_joins(),
+    ))
+
+    # The shared call keeps its arrival order in the interactive lane, ahead of the caller that promoted it.
+    assert [name for name, _ in granted] == ["first", "shared", "interactive", "background"]
+
+
+def test_shared_lane_keeps_background_priority_until_promoted(clock):
+    upstream = TokenBucketScheduler("test", requests_per_minute=60, burst=1)
+    granted = []
+    call = _schedule(clock, granted, upstream)
+
+    asyncio.run(clock.run(
+        call("first"), call("shared", SharedLane(BACKGROUND)), call("interactive"),
+    ))
+
+    assert [name for name, _ in granted] == ["first", "interactive", "shared"]
+
+
+def test_throttle_pauses_calls_and_halves_the_rate(clock):
+    upstream = TokenBucketScheduler("test", requests_per_minute=60, burst=1)
+    granted = []
+    call = _schedule(clock, granted, upstream)
+
+    async def throttled_then_two_calls():
+        await call("first")
+        assert upstream.throttled(retry_after=5.0) == 5.0
+        await asyncio.gather(call("after pause"), call("at half rate"))
+
+    asyncio.run(clock.run(throttled_then_two_calls()))
+
+    assert upstream.rate_factor == 0.5
+    assert granted == [
+        ("first", 0.0), ("after pause", pytest.approx(5.0)), ("at half rate", pytest.approx(7.0)),
+    ]
+
+
+def test_consecutive_throttles_back_off_and_successes_restore_the_rate(clock):
+    upstream = TokenBucketScheduler("test", requests_per_minute=60, burst=1)
+
+    assert upstream.throttled() == scheduler.BASE_BACKOFF_SECONDS
+    assert upstream.throttled() == 2 * scheduler.BASE_BACKOFF_SECONDS
+    assert upstream.rate_factor == 0.25
+    for _ in range(3):
+        upstream.throttled()
+    assert upstream.rate_factor == scheduler.MIN_RATE_FACTOR
+
+    upstream.succeeded()
+    assert upstream.rate_factor == pytest.approx(scheduler.MIN_RATE_FACTOR + scheduler.RECOVERY_PER_SUCCESS)
+    # The backoff starts over after a success.
+    assert upstream.throttled() == scheduler.BASE_BACKOFF_SECONDS
@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+
+from tutor_agent.tools.session_materials import (
+    MATERIAL_INDEX_KEY, MATERIAL_KEY_PREFIX, MATERIAL_OUTPUT_KEY, material_key, remember_materials,
+)
+
+REQUEST = 'Topic: "Modern Art"\nSection: "Movements"\nSubtopic: "Cubism"'
+
+
+def _context(output: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        agent_name="edu_materials_agent",
+        state={MATERIAL_OUTPUT_KEY: output},
+        user_content=types.Content(role="user", parts=[types.Part(text=REQUEST)]),
+    )
+
+
+def test_material_is_stored_under_the_requested_subtopic():
+    context = _context("```json\n{title: 'Cubism', summary: 'Shapes.', material: [{text: 'Picasso'}],}\n```")
+    remember_materials(context)
+    key = material_key("Modern Art", "Movements", "Cubism")
+    assert context.state[MATERIAL_INDEX_KEY] == [key]
+    entry = context.state[MATERIAL_KEY_PREFIX + key]
+    assert entry["material"]["material"][0]["text"] == "Picasso"
+    assert entry["digest"]["keyPoints"] == ["Picasso"]
+
+
+@pytest.mark.parametrize("output", ['["Cubism"]', '"Cubism"', "42", "{éclair: ", "Sorry, I can't."])
+def test_invalid_material_is_not_stored(output):
+    context = _context(output)
+    remember_materials(context)
+    assert MATERIAL_INDEX_KEY not in context.state
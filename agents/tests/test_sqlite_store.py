@@ -0,0 +1,24 @@
+import threading
+
+from tutor_agent.runtime.sqlite_store import SQLiteStore
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS items (key TEXT PRIMARY KEY)"
+
+
+def test_store_creates_directory_and_schema(tmp_path):
+    store = SQLiteStore(str(tmp_path / "nested" / "store.sqlite3"), SCHEMA)
+    connection = store.connection()
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    connection.execute("INSERT INTO items VALUES ('a')")
+    # A second store on the same file sees the rows, the schema is only created if missing.
+    assert SQLiteStore(store.path, SCHEMA).connection().execute("SELECT key FROM items").fetchall() == [("a",)]
+
+
+def test_each_thread_gets_its_own_connection(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.sqlite3"), SCHEMA)
+    connections = []
+    thread = threading.Thread(target=lambda: connections.append(store.connection()))
+    thread.start()
+    thread.join()
+    assert store.connection() is store.connection()
+    assert connections[0] is not store.connection()
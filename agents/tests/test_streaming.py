@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+from google.adk.events import Event
+from google.genai import types
+
+from tutor_agent.runtime import streaming
+from tutor_agent.runtime.streaming import IncrementalItemParser, stream_items
+from tutor_agent.sub_agents.edu_materials_agent.types import MaterialBlock
+from tutor_agent.sub_agents.topic_creator_agent.types import Section
+
+TOPIC = json.dumps({
+    "title": "Design",
+    "subject": "Design",
+    "sections": [
+        {"title": "Basics", "subtopics": [{"title": "What is UI?", "summary": "Intro"}]},
+        {"title": "Tools", "subtopics": [{"title": "Figma", "summary": "Frames"}, {"title": "Sketch"}]},
+    ],
+})
+
+
+def feed_in_chunks(parser: IncrementalItemParser, text: str, size: int) -> list:
+    items = []
+    for start in range(0, len(text), size):
+        items += parser.feed(text[start:start + size])
+    return items
+
+
+def test_items_are_yielded_for_every_chunk_size():
+    for size in (1, 2, 3, 7, 50, len(TOPIC)):
+        items = feed_in_chunks(IncrementalItemParser("sections", Section), TOPIC, size)
+        assert [item.title for item in items] == ["Basics", "Tools"], size
+
+
+def test_item_is_yielded_when_it_closes_not_before():
+    parser = IncrementalItemParser("sections", Section)
+    split = TOPIC.index("Tools") + 2
+    assert [item.title for item in parser.feed(TOPIC[:split])] == ["Basics"]
+    assert [item.title for item in parser.feed(TOPIC[split:])] == ["Tools"]
+
+
+def test_nested_arrays_are_not_items():
+    parser = IncrementalItemParser("sections", Section)
+    items = parser.feed(TOPIC)
+    assert [len(item.subtopics) for item in items] == [1, 2]
+
+
+def test_quotes_brackets_and_escapes_inside_strings():
+    text = json.dumps({"material": [
+        {"text": 'He said "}]{[" and left \\ here'},
+        {"text": "second ] } block"},
+    ]})
+    items = feed_in_chunks(IncrementalItemParser("material", MaterialBlock), text, 1)
+    assert [item.text for item in items] == ['He said "}]{[" and left \\ here', "second ] } block"]
+
+
+def test_bare_keys_and_other_arrays_are_handled():
+    text = '{title: "T", references: [{"text": "not a block"}], material: [{text: "a"}, {text: "b"}]}'
+    items = feed_in_chunks(IncrementalItemParser("material", MaterialBlock), text, 4)
+    assert [item.text for item in items] == ["a", "b"]
+
+
+def test_invalid_items_are_skipped_and_recorded():
+    parser = IncrementalItemParser("sections", Section)
+    items = parser.feed('{"sections": [{"title": "No subtopics"}, {"title": "Ok", "subtopics": []}]}')
+    assert [item.title for item in items] == ["Ok"]
+    assert len(parser.errors) == 1
+
+
+def _event(text: str = "", partial: bool = False, function_call: bool = False) -> Event:
+    part = types.Part(function_call=types.FunctionCall(name="search", args={})) if function_call else types.Part(text=text)
+    return Event(author="agent", partial=partial, content=types.Content(role="model", parts=[part]))
+
+
+def _collect(monkeypatch, events: list[Event]) -> list:
+    async def fake_stream_agent(agent, text, run_config=None):
+        for event in events:
+            yield event
+
+    class Agent:
+        name = "agent"
+
+    async def collect():
+        return [item async for item in stream_items(Agent(), "request", "sections", Section)]
+
+    monkeypatch.setattr(streaming, "stream_agent", fake_stream_agent)
+    return asyncio.run(collect())
+
+
+def test_final_event_does_not_repeat_streamed_items(monkeypatch):
+    half = len(TOPIC) // 2
+    results = _collect(monkeypatch, [_event(TOPIC[:half], True), _event(TOPIC[half:], True), _event(TOPIC)])
+    assert [value.title for kind, value in results if kind == "item"] == ["Basics", "Tools"]
+    assert results[-1] == ("final", TOPIC)
+
+
+def test_final_event_is_parsed_without_partials(monkeypatch):
+    results = _collect(monkeypatch, [_event(TOPIC)])
+    assert [value.title for kind, value in results if kind == "item"] == ["Basics", "Tools"]
+
+
+def test_items_written_again_after_a_tool_call_are_not_repeated(monkeypatch):
+    first = TOPIC[:TOPIC.index("Tools") - 10]
+    results = _collect(monkeypatch, [
+        _event(first, True), _event(function_call=True), _event(TOPIC, True), _event(TOPIC),
+    ])
+    assert [value.title for kind, value in results if kind == "item"] == ["Basics", "Tools"]
@@ -1 +1,17 @@
-from . import agent
\ No newline at end of file
+"""Learnie tutor agents.
+
+Importing the package is cheap: the agent tree is built on first access to `tutor_agent.agent`
+(as ADK does to find `root_agent`) or through `registry.get_agent`.
+"""
+
+import importlib
+
+from .env import load_env
+
+load_env()
+
+
+def __getattr__(name: str):
+    if name == "agent":
+        return importlib.import_module(".agent", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,18 @@
 from google.adk.agents import Agent
 from google.adk.tools.agent_tool import AgentTool
 
+from .runtime.instrumentation import instrument
+from .runtime.prefetch import install_prefetch
+from .runtime.prompts import install_prompt_assembly
+from .runtime.scheduled_gemini import register_scheduled_gemini
 from .sub_agents.edu_game_developer import edu_game_developer
 from .sub_agents.edu_materials_agent import edu_materials_agent
-from .sub_agents.topic_creator_agent import topic_creator_agent
+from .sub_agents.edu_quiz_developer import edu_quiz_developer
+from .sub_agents.topic_creator_agent import topic_creator_agent, topic_structure_agent
 from .tools import brave_search_tools
+from .tools.session_materials import compact_history, get_material_digest, list_session_materials
+
+register_scheduled_gemini()
 
 root_agent = Agent(
     name="tutor_agent",
@@ -15,11 +23,21 @@ root_agent = Agent(
         You are a professional tutor. You are responsible for the learning process of students (users) for particular material.
         You starts with defining the topic what user wants to learn and delegating it to `topic_creator_agent` to create a topic structure for the next learning process.
         When the topics are defined you can provide educational materials using subtopic title and summary, section title and topic title using `edu_materials_agent`.
-        When user asks about the learning progress score regarding the subtopic, take everything you know about this in the current session (materials, quizes) and provide the score (0 to 100). This score means how much and how good the user has learned from the subtopic.
+        When user asks about the learning progress score regarding the subtopic, use `list_session_materials` and `get_material_digest` to recall the subtopic materials generated in the current session, take the practice task results (quizes, games) into account and provide the score (0 to 100). This score means how much and how good the user has learned from the subtopic.
+        Earlier materials in the conversation are replaced by short references, use `get_material_digest` instead of asking to generate them again.
         You can give practice tasks like quizzes, tests, games based on the material to help users memorize the material.
-        When you are asked to create a game, you should use `edu_game_developer` based on the user request and the subtopic materials .
+        When you are asked to create a quiz, you should use `edu_quiz_developer` with the subtopic title, the material of this session's subtopic is added to its instructions automatically.
+        When you are asked to create a game, you should use `edu_game_developer` based on the user request and the subtopic title, it reads the subtopic material digest itself.
         You can evaluate the material learning progress based on the practice task results: if you are asked about the current progress, you should give the current score (from 0 to 100).
         """
     ),
-    sub_agents=[topic_creator_agent,edu_materials_agent,edu_game_developer],
+    sub_agents=[topic_creator_agent,edu_materials_agent,edu_quiz_developer,edu_game_developer],
+    tools=[list_session_materials, get_material_digest],
+    before_model_callback=compact_history,
 )
+
+install_prefetch(root_agent)
+install_prompt_assembly(root_agent)
+install_prompt_assembly(topic_structure_agent)
+instrument(root_agent)
+instrument(topic_structure_agent)
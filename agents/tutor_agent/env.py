@@ -0,0 +1,11 @@
+"""Process environment of the tutor: the `.env` file is loaded once, before any module reads its settings."""
+
+import functools
+
+from dotenv import load_dotenv
+
+
+@functools.cache
+def load_env() -> None:
+    """Loads variables from the `.env` file without overriding the ones already set."""
+    load_dotenv()
@@ -0,0 +1,37 @@
+"""Lazy access to the agents of the tutor by name.
+
+Agent modules are only imported (and their agents built) when an agent is first requested. Every
+agent comes from the root agent tree, so pipelines get the same instrumented instances as the chat.
+"""
+
+import functools
+import importlib
+
+from google.adk.agents import BaseAgent
+
+# Agent name -> module defining it, relative to this package.
+AGENT_MODULES = {
+    "edu_game_developer": ".sub_agents.edu_game_developer.agent",
+    "edu_materials_agent": ".sub_agents.edu_materials_agent.agent",
+    "edu_quiz_developer": ".sub_agents.edu_quiz_developer.agent",
+    "topic_creator_agent": ".sub_agents.topic_creator_agent.agent",
+    "topic_structure_agent": ".sub_agents.topic_creator_agent.agent",
+}
+
+
+@functools.cache
+def get_root_agent() -> BaseAgent:
+    """Builds the root agent and wires up the whole tree on first use."""
+    return importlib.import_module(".agent", __package__).root_agent
+
+
+def get_agent(name: str) -> BaseAgent:
+    """Returns the agent with the given name, building the agent tree if needed.
+
+    Raises:
+        KeyError: There is no agent with this name
+    """
+    if name == "tutor_agent":
+        return get_root_agent()
+    get_root_agent()
+    return getattr(importlib.import_module(AGENT_MODULES[name], __package__), name)
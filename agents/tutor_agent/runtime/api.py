@@ -0,0 +1,139 @@
+"""HTTP endpoints that stream topics and materials as server-sent events and serve quizzes."""
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+from .materials_pipeline import materials_request
+from .metrics import metrics
+from .prefetch import PREFETCH_AHEAD, cancel_prefetch, get_prefetcher, start_prefetch
+from .quiz_pipeline import generate_subtopic_quiz, generate_topic_quizzes
+from .streaming import format_sse, replay_topic_events, stream_material_events, stream_topic_events
+from .topic_library import find_reusable_topic, get_topic_library, seeded_request
+from ..registry import get_agent
+from ..sub_agents.edu_quiz_developer.types import Quiz
+from ..sub_agents.topic_creator_agent.types import Subtopic, Topic
+from ..tools.image_proxy import get_thumbnail_store
+
+router = APIRouter()
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# Thumbnails are content-addressed: a name always refers to the same bytes.
+IMAGE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+
+class TopicRequest(BaseModel):
+    request: str
+    regenerate: bool = False
+    # Client session for speculative materials prefetch, see runtime/prefetch.py.
+    session_id: Optional[str] = None
+
+
+class MaterialsRequest(BaseModel):
+    topic: str
+    section: str
+    subtopic: str
+    summary: Optional[str] = None
+    regenerate: bool = False
+    session_id: Optional[str] = None
+
+
+class TopicQuizzesRequest(BaseModel):
+    topic: Topic
+    regenerate: bool = False
+
+
+class QuizRequest(BaseModel):
+    topic: Topic
+    section: str
+    subtopic: str
+    regenerate: bool = False
+
+
+@router.post("/topics/stream")
+async def stream_topic(body: TopicRequest) -> StreamingResponse:
+    """Streams `section` events as the topic structure is generated, then the full `topic`.
+
+    Near-duplicates of earlier requests are answered from the topic library. With a `session_id`
+    the materials of the first subtopics are prefetched in the background.
+    """
+    def on_topic(topic: Topic, generated: bool) -> None:
+        if generated:
+            get_topic_library().add(body.request, topic)
+        if body.session_id:
+            start_prefetch(body.session_id, topic)
+
+    reusable, seed = (None, None) if body.regenerate else find_reusable_topic(body.request)
+    if reusable:
+        events = replay_topic_events(reusable, lambda topic: on_topic(topic, generated=False))
+    else:
+        request = seeded_request(body.request, seed) if seed else body.request
+        events = stream_topic_events(
+            get_agent("topic_creator_agent"), request, body.regenerate, lambda topic: on_topic(topic, generated=True)
+        )
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/materials/stream")
+async def stream_materials(body: MaterialsRequest) -> StreamingResponse:
+    """Streams `block` events as the subtopic material is generated, then the full `material`."""
+    prefetcher = get_prefetcher(body.session_id) if body.session_id else None
+    if prefetcher and (index := prefetcher.find_subtopic(body.subtopic)) is not None:
+        prefetcher.prefetch(PREFETCH_AHEAD, after=index)
+    request = materials_request(body.topic, body.section, Subtopic(title=body.subtopic, summary=body.summary))
+    return StreamingResponse(
+        stream_material_events(get_agent("edu_materials_agent"), request, body.regenerate),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.post("/topics/quizzes/stream")
+async def stream_topic_quizzes(body: TopicQuizzesRequest) -> StreamingResponse:
+    """Generates quizzes for all subtopics of the topic, streaming a `quiz` or `error` event per subtopic."""
+    async def events():
+        async for item in generate_topic_quizzes(body.topic, regenerate=body.regenerate):
+            data = {"section": item.section.title, "subtopic": item.subtopic.title}
+            if item.error:
+                yield format_sse("error", {**data, "error": item.error})
+            else:
+                yield format_sse("quiz", {**data, "quiz": item.result.model_dump(exclude_none=True)})
+        yield format_sse("done", {})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/quizzes", response_model=Quiz, response_model_exclude_none=True)
+async def get_quiz(body: QuizRequest) -> Quiz:
+    """The quiz of one subtopic; instant once `/topics/quizzes/stream` has run for the topic."""
+    for section in body.topic.sections:
+        for subtopic in section.subtopics:
+            if section.title == body.section and subtopic.title == body.subtopic:
+                return await generate_subtopic_quiz(body.topic, section, subtopic, body.regenerate)
+    raise HTTPException(status_code=404, detail=f"Subtopic '{body.subtopic}' not found in section '{body.section}'")
+
+
+@router.delete("/sessions/{session_id}/prefetch", status_code=204)
+async def end_session_prefetch(session_id: str) -> None:
+    """Cancels the session's outstanding prefetches when the client closes it."""
+    cancel_prefetch(session_id)
+
+
+@router.get("/images/{name}")
+async def get_image(name: str, request: Request) -> Response:
+    """A thumbnail of the image proxy, see tools/image_proxy.py."""
+    path = get_thumbnail_store().path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    headers = {**IMAGE_HEADERS, "ETag": f'"{name.split(".")[0]}"'}
+    if request.headers.get("If-None-Match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, headers=headers)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> str:
+    """Agent, model and tool metrics in the Prometheus text format."""
+    return metrics.render()
@@ -0,0 +1,168 @@
+"""Explicit context caching of the static prompt prefix of the agents.
+
+With GEMINI_CONTEXT_CACHE=1 the static system instruction and the tool declarations of a request are
+stored once as Gemini cached content, and the request only sends the per-request parts along with the
+cache name. Prefixes shorter than CONTEXT_CACHE_MIN_TOKENS are sent as usual: Gemini doesn't cache them.
+"""
+
+import abc
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from google.adk.models.llm_request import LlmRequest
+from google.genai import Client, types
+
+from .metrics import metrics
+from .prompts import estimate_tokens, get_prompt_assembly
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MIN_TOKENS = 1024
+# A cache is recreated this long before it expires, so no request refers to an expired one.
+EXPIRY_MARGIN_SECONDS = 60
+
+metrics.describe("learnie_context_cache_total", "counter", "Model requests by context cache result: hit, created, skipped or failed.")
+
+
+def context_cache_enabled() -> bool:
+    return os.environ.get("GEMINI_CONTEXT_CACHE", "0") == "1"
+
+
+class CachedPrefix:
+    """What a request shares with the others: the static system instruction and the tools."""
+
+    def __init__(self, model: str, system_instruction: str, config: types.GenerateContentConfig):
+        self.model = model
+        self.system_instruction = system_instruction
+        self.tools = config.tools
+        self.tool_config = config.tool_config
+
+    @property
+    def key(self) -> str:
+        digest = hashlib.sha256(self.model.encode())
+        digest.update(self.system_instruction.encode())
+        for tool in self.tools or []:
+            digest.update(tool.model_dump_json(exclude_none=True).encode())
+        if self.tool_config:
+            digest.update(self.tool_config.model_dump_json(exclude_none=True).encode())
+        return digest.hexdigest()
+
+
+class ContextCache(abc.ABC):
+    """Names of the cached contents per prefix, created once and renewed before they expire.
+
+    Subclasses create the cached content; a prefix that failed to be cached is only retried after the TTL.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._names: dict[str, tuple[Optional[str], float]] = {}
+        self._flights = SingleFlight("context_cache")
+
+    @abc.abstractmethod
+    async def _create(self, prefix: CachedPrefix) -> str:
+        """Stores the prefix as cached content and returns its name."""
+
+    async def _create_entry(self, prefix: CachedPrefix) -> Optional[str]:
+        try:
+            name = await self._create(prefix)
+        except Exception as e:
+            logger.warning("Not caching the prompt prefix of %s: %s", prefix.model, e)
+            name = None
+        with self._lock:
+            self._names[prefix.key] = (name, time.time() + self.ttl_seconds - EXPIRY_MARGIN_SECONDS)
+        metrics.inc("learnie_context_cache_total", {"result": "created" if name else "failed"})
+        return name
+
+    async def get(self, prefix: CachedPrefix) -> Optional[str]:
+        """Name of the cached content of the prefix, None if it can't be cached."""
+        key = prefix.key
+        with self._lock:
+            entry = self._names.get(key)
+        if entry and entry[1] > time.time():
+            if entry[0]:
+                metrics.inc("learnie_context_cache_total", {"result": "hit"})
+            return entry[0]
+        return await self._flights.do(key, lambda: self._create_entry(prefix))
+
+
+class GeminiContextCache(ContextCache):
+    """Cached contents stored by the Gemini API."""
+
+    def __init__(self, client: Client, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        super().__init__(ttl_seconds)
+        self.client = client
+
+    async def _create(self, prefix: CachedPrefix) -> str:
+        cache = await self.client.aio.caches.create(
+            model=prefix.model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=prefix.system_instruction,
+                tools=prefix.tools,
+                tool_config=prefix.tool_config,
+                ttl=f"{int(self.ttl_seconds)}s",
+                display_name=f"learnie-{prefix.key[:16]}",
+            ),
+        )
+        return cache.name
+
+
+class LocalContextCache(ContextCache):
+    """In-process stand-in for the Gemini cache, for stub models: `resolve` returns the cached prefix."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        super().__init__(ttl_seconds)
+        self.prefixes: dict[str, CachedPrefix] = {}
+
+    async def _create(self, prefix: CachedPrefix) -> str:
+        name = f"cachedContents/local-{prefix.key[:16]}"
+        self.prefixes[name] = prefix
+        return name
+
+    def resolve(self, name: str) -> CachedPrefix:
+        return self.prefixes[name]
+
+
+_gemini_cache: Optional[GeminiContextCache] = None
+
+
+def get_gemini_context_cache(client: Client) -> GeminiContextCache:
+    """Returns the process-wide Gemini context cache, configured via CONTEXT_CACHE_TTL_SECONDS."""
+    global _gemini_cache
+    if _gemini_cache is None:
+        _gemini_cache = GeminiContextCache(client, float(os.environ.get("CONTEXT_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)))
+    return _gemini_cache
+
+
+async def apply_context_cache(llm_request: LlmRequest, cache: ContextCache) -> bool:
+    """Moves the static prefix of the request to the context cache.
+
+    The request then carries the cache name instead of the system instruction and the tools (Gemini
+    rejects both alongside cached content); the per-request instructions go before the contents.
+
+    Returns:
+        whether the request uses the cache
+    """
+    parts = get_prompt_assembly().split(llm_request)
+    min_tokens = int(os.environ.get("CONTEXT_CACHE_MIN_TOKENS", DEFAULT_MIN_TOKENS))
+    if not llm_request.config or estimate_tokens(parts.static) < min_tokens:
+        metrics.inc("learnie_context_cache_total", {"result": "skipped"})
+        return False
+    name = await cache.get(CachedPrefix(llm_request.model, parts.static, llm_request.config))
+    if name is None:
+        return False
+    config = llm_request.config
+    config.cached_content = name
+    config.system_instruction = None
+    config.tools = None
+    config.tool_config = None
+    if parts.dynamic:
+        llm_request.contents.insert(0, types.Content(role="user", parts=[types.Part(text=parts.dynamic)]))
+    return True
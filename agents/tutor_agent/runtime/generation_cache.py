@@ -0,0 +1,160 @@
+"""Content-addressed cache of validated agent outputs (topics, subtopic materials, ...)."""
+
+import functools
+import hashlib
+import json
+import os
+import time
+import unicodedata
+from collections import Counter
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from google.adk.agents import Agent
+from pydantic import BaseModel, ValidationError
+
+from .single_flight import SingleFlight
+from .sqlite_store import SQLiteStore, default_path
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+DEFAULT_CACHE_PATH = default_path("generation_cache.sqlite3")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Concurrent misses for the same key share one generation.
+generation_flights = SingleFlight("generation")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+  key TEXT PRIMARY KEY,
+  agent TEXT NOT NULL,
+  value TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  created_at REAL NOT NULL,
+  accessed_at REAL NOT NULL
+)
+"""
+
+
+def model_name(agent: Agent) -> str:
+    """Returns the model string of the agent, whether it is set as a name or as a model object."""
+    return agent.model if isinstance(agent.model, str) else getattr(agent.model, "model", type(agent.model).__name__)
+
+
+def normalize_input(text: str) -> str:
+    """Folds case, Unicode forms and whitespace only: punctuation matters ("C++" isn't "C")."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def generation_key(agent: Agent, user_input: str) -> str:
+    """Hashes everything that determines the agent's output.
+
+    The instruction text and the model string are part of the key, so editing a prompt or switching
+    models invalidates the old entries automatically.
+    """
+    config = agent.generate_content_config
+    fingerprint = {
+        "agent": agent.name,
+        "model": model_name(agent),
+        "instruction": agent.instruction if isinstance(agent.instruction, str) else agent.instruction.__qualname__,
+        "temperature": config.temperature if config else None,
+        "output_schema": agent.output_schema.__name__ if agent.output_schema else None,
+        "input": normalize_input(user_input),
+    }
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+
+
+class GenerationCache:
+    """SQLite-backed store of validated outputs, bounded by total size with least-recently-used eviction."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = Counter()
+        self._store = SQLiteStore(path, _SCHEMA)
+
+    def get(self, key: str, model: type[ModelT]) -> Optional[ModelT]:
+        connection = self._store.connection()
+        row = connection.execute("SELECT value FROM generations WHERE key = ?", (key,)).fetchone()
+        if row:
+            try:
+                value = model.model_validate_json(row[0])
+            except ValidationError:
+                # The model changed shape since the entry was written.
+                connection.execute("DELETE FROM generations WHERE key = ?", (key,))
+            else:
+                connection.execute("UPDATE generations SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                self.stats["hits"] += 1
+                return value
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, agent_name: str, value: BaseModel) -> None:
+        payload = value.model_dump_json()
+        now = time.time()
+        self._store.connection().execute(
+            "INSERT OR REPLACE INTO generations (key, agent, value, size, created_at, accessed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (key, agent_name, payload, len(payload), now, now),
+        )
+        self.stats["writes"] += 1
+        if self.stats["writes"] % 100 == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        """Deletes least recently used entries until the cache fits into `max_bytes`."""
+        connection = self._store.connection()
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM generations").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        stale = []
+        for key, size in connection.execute("SELECT key, size FROM generations ORDER BY accessed_at"):
+            if total - freed <= self.max_bytes:
+                break
+            stale.append((key,))
+            freed += size
+        connection.executemany("DELETE FROM generations WHERE key = ?", stale)
+        self.stats["evictions"] += len(stale)
+
+
+@functools.cache
+def get_generation_cache() -> GenerationCache:
+    """Returns the process-wide generation cache configured via GENERATION_CACHE_* environment variables."""
+    return GenerationCache(
+        path=os.environ.get("GENERATION_CACHE_PATH", DEFAULT_CACHE_PATH),
+        max_bytes=int(os.environ.get("GENERATION_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+    )
+
+
+async def cached_generation(
+        agent: Agent,
+        user_input: str,
+        output_model: type[ModelT],
+        generate: Callable[[], Awaitable[ModelT]],
+        regenerate: bool = False,
+) -> ModelT:
+    """Returns the cached output for (agent, input) or generates and stores it.
+
+    Concurrent calls with the same key wait on a single generation; each caller gets its own copy.
+
+    Args:
+        agent: The agent producing the output
+        user_input: The user input the agent is run with
+        output_model: Pydantic model of the output
+        generate: Produces a fresh validated output on a miss
+        regenerate: Skip the lookup and overwrite the entry with a fresh output
+    """
+    cache = get_generation_cache()
+    key = generation_key(agent, user_input)
+    if not regenerate:
+        cached = cache.get(key, output_model)
+        if cached is not None:
+            return cached
+
+    async def generate_and_store() -> ModelT:
+        value = await generate()
+        cache.set(key, agent.name, value)
+        return value
+
+    value = await generation_flights.do(key, generate_and_store)
+    return value.model_copy(deep=True)
@@ -0,0 +1,229 @@
+"""Before/after callbacks that record latency, tokens, tool calls and errors for every agent and tool."""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from google.adk.agents import Agent, BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+from opentelemetry import trace
+
+from .generation_cache import get_generation_cache
+from .metrics import metrics
+from .prompts import content_tokens, estimate_tokens
+from ..tools.image_cache import get_image_cache
+
+tracer = trace.get_tracer("tutor_agent")
+
+MAX_PENDING = 10_000
+
+metrics.describe("learnie_agent_invocations_total", "counter", "Agent invocations.")
+metrics.describe("learnie_agent_short_circuits_total", "counter", "Agent runs answered by a before-agent callback.")
+metrics.describe("learnie_agent_duration_seconds", "histogram", "Agent wall time, including sub-agents and tools.")
+metrics.describe("learnie_model_calls_total", "counter", "Model calls.")
+metrics.describe("learnie_model_errors_total", "counter", "Model calls that returned an error.")
+metrics.describe("learnie_model_duration_seconds", "histogram", "Model call wall time.")
+metrics.describe("learnie_model_tokens_total", "counter", "Model tokens (estimated when the model reports no usage).")
+metrics.describe("learnie_tool_calls_total", "counter", "Tool calls.")
+metrics.describe("learnie_tool_errors_total", "counter", "Tool calls that returned an error.")
+metrics.describe("learnie_tool_duration_seconds", "histogram", "Tool call wall time.")
+metrics.describe("learnie_cache_events_total", "counter", "Cache hits, misses and writes.")
+
+
+class _Pending:
+    """Start times and open spans of in-flight calls, bounded in case an `after` callback never runs."""
+
+    def __init__(self):
+        self._items: OrderedDict[tuple, tuple[float, trace.Span, Any]] = OrderedDict()
+
+    def start(self, key: tuple, span_name: str, attributes: dict[str, Any], data: Any = None) -> None:
+        self._items[key] = (time.perf_counter(), tracer.start_span(span_name, attributes=attributes), data)
+        while len(self._items) > MAX_PENDING:
+            self._items.popitem(last=False)[1][1].end()
+
+    def finish(self, key: tuple, error: Optional[str] = None) -> tuple[Optional[float], Any]:
+        """Ends the span and returns the elapsed seconds and the data passed to `start`."""
+        entry = self._items.pop(key, None)
+        if entry is None:
+            return None, None
+        started, span, data = entry
+        if error:
+            span.set_status(trace.Status(trace.StatusCode.ERROR, error))
+        span.end()
+        return time.perf_counter() - started, data
+
+
+_agents = _Pending()
+_models = _Pending()
+_tools = _Pending()
+
+
+def _estimate_tokens(contents: list[types.Content], system_instruction: Any = None) -> int:
+    instruction = system_instruction if isinstance(system_instruction, str) else ""
+    return estimate_tokens(instruction) + sum(content_tokens(content) for content in contents)
+
+
+def _before_agent(callback_context: CallbackContext) -> None:
+    labels = {"agent": callback_context.agent_name}
+    metrics.inc("learnie_agent_invocations_total", labels)
+    _agents.start((callback_context.invocation_id, callback_context.agent_name),
+                  f"agent [{callback_context.agent_name}]", labels)
+
+
+def _after_agent(callback_context: CallbackContext) -> None:
+    elapsed, _ = _agents.finish((callback_context.invocation_id, callback_context.agent_name))
+    if elapsed is not None:
+        metrics.observe("learnie_agent_duration_seconds", {"agent": callback_context.agent_name}, elapsed)
+
+
+def _before_model(callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+    labels = {"agent": callback_context.agent_name}
+    metrics.inc("learnie_model_calls_total", labels)
+    prompt_tokens = _estimate_tokens(
+        llm_request.contents, llm_request.config.system_instruction if llm_request.config else None
+    )
+    _models.start((callback_context.invocation_id, callback_context.agent_name),
+                  f"model [{callback_context.agent_name}]", {**labels, "model": llm_request.model or ""}, prompt_tokens)
+
+
+def _after_model(callback_context: CallbackContext, llm_response: LlmResponse) -> None:
+    if llm_response.partial:
+        return
+    labels = {"agent": callback_context.agent_name}
+    elapsed, prompt_tokens = _models.finish(
+        (callback_context.invocation_id, callback_context.agent_name), llm_response.error_message
+    )
+    if elapsed is not None:
+        metrics.observe("learnie_model_duration_seconds", labels, elapsed)
+    if llm_response.error_code:
+        metrics.inc("learnie_model_errors_total", {**labels, "code": llm_response.error_code})
+
+    usage = (llm_response.custom_metadata or {}).get("usage") or {
+        "prompt_tokens": prompt_tokens or 0,
+        "output_tokens": _estimate_tokens([llm_response.content] if llm_response.content else []),
+    }
+    metrics.inc("learnie_model_tokens_total", {**labels, "kind": "prompt"}, usage["prompt_tokens"])
+    metrics.inc("learnie_model_tokens_total", {**labels, "kind": "output"}, usage["output_tokens"])
+    if usage.get("cached_tokens"):
+        metrics.inc("learnie_model_tokens_total", {**labels, "kind": "cached"}, usage["cached_tokens"])
+
+
+def _before_tool(tool: BaseTool, args: dict[str, Any], tool_context: ToolContext) -> None:
+    labels = {"agent": tool_context.agent_name, "tool": tool.name}
+    metrics.inc("learnie_tool_calls_total", labels)
+    _tools.start((tool_context.function_call_id,), f"tool [{tool.name}]", labels)
+
+
+def _after_tool(tool: BaseTool, args: dict[str, Any], tool_context: ToolContext, tool_response: Any) -> None:
+    labels = {"agent": tool_context.agent_name, "tool": tool.name}
+    error = tool_response.get("error") if isinstance(tool_response, dict) else None
+    elapsed, _ = _tools.finish((tool_context.function_call_id,), error)
+    if elapsed is not None:
+        metrics.observe("learnie_tool_duration_seconds", labels, elapsed)
+    if error or tool_response is None:
+        metrics.inc("learnie_tool_errors_total", labels)
+
+
+def _chain_before(instrument_callback, callback, finish):
+    """Runs the instrumentation before the agent's own callback.
+
+    If the agent's callback short-circuits the step, the matching `after` callback is never
+    invoked, so the measurement is finished right here.
+    """
+    if callback is None:
+        return instrument_callback
+
+    def chained(*args, **kwargs):
+        instrument_callback(*args, **kwargs)
+        result = callback(*args, **kwargs)
+        if result is not None:
+            finish(*args, **kwargs)
+        return result
+
+    return chained
+
+
+def _chain_before_model(callback):
+    """Runs the agent's own callback first, so the prompt tokens are counted on the request that is sent
+    after history compaction and budget trimming. A short-circuited request never reaches the model."""
+    if callback is None:
+        return _before_model
+
+    def chained(*args, **kwargs):
+        result = callback(*args, **kwargs)
+        if result is None:
+            _before_model(*args, **kwargs)
+        return result
+
+    return chained
+
+
+def _chain_after(instrument_callback, callback):
+    if callback is None:
+        return instrument_callback
+
+    def chained(*args, **kwargs):
+        result = callback(*args, **kwargs)
+        instrument_callback(*args, **kwargs)
+        return result
+
+    return chained
+
+
+async def _chain_tool_before(tool, args, tool_context, callback):
+    _before_tool(tool, args, tool_context)
+    result = callback(tool=tool, args=args, tool_context=tool_context)
+    if hasattr(result, "__await__"):
+        result = await result
+    if result is not None:
+        _after_tool(tool, args, tool_context, result)
+    return result
+
+
+def _finish_short_circuit(callback_context: CallbackContext, **_) -> None:
+    metrics.inc("learnie_agent_short_circuits_total", {"agent": callback_context.agent_name})
+    _after_agent(callback_context)
+
+
+def instrument(agent: BaseAgent) -> BaseAgent:
+    """Wires the instrumentation callbacks onto the agent and all of its sub-agents.
+
+    Set LEARNIE_INSTRUMENTATION=0 to disable.
+    """
+    if os.environ.get("LEARNIE_INSTRUMENTATION", "1") == "0" or getattr(agent, "_instrumented", False):
+        return agent
+    object.__setattr__(agent, "_instrumented", True)
+
+    agent.before_agent_callback = _chain_before(_before_agent, agent.before_agent_callback, _finish_short_circuit)
+    agent.after_agent_callback = _chain_after(_after_agent, agent.after_agent_callback)
+    if isinstance(agent, Agent):
+        agent.before_model_callback = _chain_before_model(agent.before_model_callback)
+        agent.after_model_callback = _chain_after(_after_model, agent.after_model_callback)
+        if agent.before_tool_callback is None:
+            agent.before_tool_callback = _before_tool
+        else:
+            callback = agent.before_tool_callback
+            agent.before_tool_callback = (
+                lambda tool, args, tool_context: _chain_tool_before(tool, args, tool_context, callback)
+            )
+        agent.after_tool_callback = _chain_after(_after_tool, agent.after_tool_callback)
+    for sub_agent in agent.sub_agents:
+        instrument(sub_agent)
+    return agent
+
+
+def _cache_samples():
+    for event, value in get_image_cache().stats.items():
+        yield "learnie_cache_events_total", {"cache": "image", "event": event}, value
+    if get_generation_cache.cache_info().currsize:
+        for event, value in get_generation_cache().stats.items():
+            yield "learnie_cache_events_total", {"cache": "generation", "event": event}, value
+
+
+metrics.register_collector(_cache_samples)
@@ -0,0 +1,117 @@
+"""Concurrent generation of materials for every subtopic of a topic."""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from .generation_cache import cached_generation
+from .runner import run_agent_output
+from .scheduler import BACKGROUND, lane
+from ..registry import get_agent
+from ..sub_agents.edu_materials_agent.types import Material
+from ..sub_agents.topic_creator_agent.types import Section, Subtopic, Topic
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT_SECONDS = 120.0
+
+
+@dataclass
+class SubtopicResult:
+    """Result of a generation for one subtopic; either `result` or `error` is set."""
+    section: Section
+    subtopic: Subtopic
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+
+def materials_request(topic_title: str, section_title: str, subtopic: Subtopic) -> str:
+    """Builds the user input for `edu_materials_agent` in the format its prompt expects."""
+    request = f'Topic: "{topic_title}"\nSection: "{section_title}"\nSubtopic: "{subtopic.title}"'
+    if subtopic.summary:
+        request += f'\nSubtopic summary: "{subtopic.summary}"'
+    return request
+
+
+async def generate_subtopic_materials(
+        topic: Topic,
+        section: Section,
+        subtopic: Subtopic,
+        regenerate: bool = False,
+) -> Material:
+    """Generates and validates the materials for a single subtopic, served from the generation cache when possible."""
+    request = materials_request(topic.title, section.title, subtopic)
+    agent = get_agent("edu_materials_agent")
+
+    async def generate() -> Material:
+        return await run_agent_output(agent, request, Material)
+
+    return await cached_generation(agent, request, Material, generate, regenerate=regenerate)
+
+
+async def for_each_subtopic(
+        topic: Topic,
+        generate: Callable[[Section, Subtopic], Awaitable[Any]],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        priority: str = BACKGROUND,
+) -> AsyncIterator[SubtopicResult]:
+    """Runs `generate` for all subtopics of the topic concurrently.
+
+    Args:
+        topic: The validated topic structure
+        generate: Coroutine function producing the result for one subtopic
+        concurrency: Maximum number of subtopics generated at the same time
+        timeout: Per-subtopic generation timeout in seconds
+        priority: Scheduler lane of the model and image search calls, batch work is background by default
+
+    Yields:
+        SubtopicResult for each subtopic in order of completion. A failed or timed out
+        subtopic is yielded with `error` set and doesn't affect the others.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(section: Section, subtopic: Subtopic) -> SubtopicResult:
+        async with semaphore:
+            with lane(priority):
+                try:
+                    result = await asyncio.wait_for(generate(section, subtopic), timeout)
+                    return SubtopicResult(section, subtopic, result=result)
+                except asyncio.TimeoutError:
+                    return SubtopicResult(section, subtopic, error=f"Timed out after {timeout:.0f}s")
+                except Exception as e:
+                    logger.exception("Generation failed for %r", subtopic.title)
+                    return SubtopicResult(section, subtopic, error=str(e))
+
+    tasks = [
+        asyncio.create_task(run(section, subtopic))
+        for section in topic.sections
+        for subtopic in section.subtopics
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def generate_topic_materials(
+        topic: Topic,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        regenerate: bool = False,
+) -> AsyncIterator[SubtopicResult]:
+    """Generates materials for all subtopics of the topic concurrently, see `for_each_subtopic`.
+
+    Yields:
+        SubtopicResult with the Material as `result`, in order of completion
+    """
+    return for_each_subtopic(
+        topic,
+        lambda section, subtopic: generate_subtopic_materials(topic, section, subtopic, regenerate),
+        concurrency,
+        timeout,
+    )
@@ -0,0 +1,92 @@
+"""In-process metrics registry rendered in the Prometheus text exposition format."""
+
+import bisect
+import threading
+from collections import defaultdict
+from typing import Callable, Iterable
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + pairs + "}" if pairs else ""
+
+
+class Metrics:
+    """Counters and histograms keyed by metric name and label set."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help: dict[str, tuple[str, str]] = {}
+        self._counters: dict[str, dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self._histograms: dict[str, dict[Labels, list]] = defaultdict(dict)
+        self._collectors: list[Callable[[], Iterable[tuple[str, dict[str, str], float]]]] = []
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, labels: dict[str, str], value: float = 1) -> None:
+        with self._lock:
+            self._counters[name][_labels(labels)] += value
+
+    def observe(self, name: str, labels: dict[str, str], value: float) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms[name].get(key)
+            if series is None:
+                series = self._histograms[name][key] = [[0] * len(self.buckets), 0, 0.0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def register_collector(self, collector: Callable[[], Iterable[tuple[str, dict[str, str], float]]]) -> None:
+        """Adds a callback producing (counter name, labels, value) samples at render time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+
+        def header(name: str, default_kind: str) -> None:
+            kind, help_text = self._help.get(name, (default_kind, ""))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        collected: dict[str, dict[Labels, float]] = defaultdict(dict)
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                collected[name][_labels(labels)] = value
+
+        with self._lock:
+            for name, series in list(self._counters.items()) + list(collected.items()):
+                header(name, "counter")
+                for labels, value in series.items():
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in self._histograms.items():
+                header(name, "histogram")
+                for labels, (counts, count, total) in series.items():
+                    cumulative = 0
+                    for bound, bucket_count in zip(self.buckets, counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {total:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
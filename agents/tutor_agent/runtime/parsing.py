@@ -0,0 +1,189 @@
+"""Parsing of the JSON objects returned by the agents, with a local repair step for almost-JSON."""
+
+import re
+from typing import Optional, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from .metrics import metrics
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+# Any letter (not only ASCII) or "_"/"$" starts an identifier, like `str.isalpha()` in `repair_json`.
+_IDENTIFIER = re.compile(r"(?:[^\W\d]|[$])[\w$-]*")
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+metrics.describe("learnie_agent_output_parses_total", "counter", "Agent JSON outputs by result: valid, repaired or unrecoverable.")
+metrics.describe("learnie_agent_output_retries_total", "counter", "Agent runs repeated because their output was unrecoverable.")
+
+
+class AgentOutputError(ValueError):
+    """The agent's output is not valid for the model, even after the local repair."""
+
+    def __init__(self, message: str, text: str):
+        super().__init__(message)
+        self.text = text
+
+
+def strip_fences(text: str) -> str:
+    """Removes a surrounding ```json ... ``` fence if the model added one anyway."""
+    return _FENCE.sub("", text.strip())
+
+
+def _skip_space(text: str, index: int) -> int:
+    """Skips whitespace and comments."""
+    while index < len(text):
+        if text[index].isspace():
+            index += 1
+        elif text.startswith("//", index):
+            end = text.find("\n", index)
+            index = len(text) if end < 0 else end
+        elif text.startswith("/*", index):
+            end = text.find("*/", index + 2)
+            index = len(text) if end < 0 else end + 2
+        else:
+            break
+    return index
+
+
+def _starts_value(text: str, index: int) -> bool:
+    """Whether a JSON value or an object key can start at `index`."""
+    if index >= len(text) or text[index] in "\"'{[]}-" or text[index].isdigit():
+        return True
+    identifier = _IDENTIFIER.match(text, index)
+    if not identifier:
+        return False
+    return identifier.group() in _LITERALS or text[_skip_space(text, identifier.end()):][:1] == ":"
+
+
+def _closes_string(text: str, index: int) -> bool:
+    """Whether the quote at `index` ends the string, judged by what follows it.
+
+    A quote followed by a delimiter (and, after a comma, by the start of the next value or key)
+    closes the string; any other quote is part of the text and has to be escaped.
+    """
+    after = _skip_space(text, index + 1)
+    if after >= len(text) or text[after] in "}]:":
+        return True
+    if text[after] == ",":
+        return _starts_value(text, _skip_space(text, after + 1))
+    return False
+
+
+def _next_is_closer(text: str, index: int) -> bool:
+    index = _skip_space(text, index)
+    return index < len(text) and text[index] in "}]"
+
+
+def repair_json(text: str) -> str:
+    """Turns almost-JSON written by a model into JSON.
+
+    Strips fences and surrounding prose, escapes quotes and raw control characters inside strings,
+    converts single-quoted strings, quotes bare keys, maps Python literals, removes comments and
+    trailing commas, and closes the brackets of a truncated output.
+    """
+    text = strip_fences(text)
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if starts:
+        start = min(starts)
+        end = text.rfind(_CLOSERS[text[start]])
+        text = text[start:end + 1] if end > start else text[start:]
+
+    out: list[str] = []
+    stack: list[str] = []
+    quote: Optional[str] = None
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if quote:
+            if char == "\\" and index + 1 < len(text):
+                escaped = text[index + 1]
+                if escaped in "\"\\/bfnrtu":
+                    out.append(char + escaped)
+                elif escaped == "'":
+                    out.append("'")
+                else:
+                    out.append("\\\\" + escaped)
+                index += 2
+                continue
+            if char == quote and _closes_string(text, index):
+                out.append('"')
+                quote = None
+            elif char == '"':
+                out.append('\\"')
+            elif char in _ESCAPES:
+                out.append(_ESCAPES[char])
+            elif ord(char) < 0x20:
+                out.append(f"\\u{ord(char):04x}")
+            else:
+                out.append(char)
+            index += 1
+            continue
+
+        if char in "\"'":
+            quote = char
+            out.append('"')
+        elif text.startswith("//", index):
+            end = text.find("\n", index)
+            index = len(text) if end < 0 else end
+            continue
+        elif text.startswith("/*", index):
+            end = text.find("*/", index + 2)
+            index = len(text) if end < 0 else end + 2
+            continue
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+            out.append(char)
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            out.append(char)
+        elif char == ",":
+            if not _next_is_closer(text, index + 1):
+                out.append(char)
+        elif char.isdigit() or char == "-":
+            number = _NUMBER.match(text, index)
+            out.append(number.group() if number else char)
+            index += len(number.group()) if number else 1
+            continue
+        elif char.isalpha() or char in "_$":
+            identifier = _IDENTIFIER.match(text, index).group()
+            out.append(_LITERALS.get(identifier) or f'"{identifier}"')
+            index += len(identifier)
+            continue
+        else:
+            out.append(char)
+        index += 1
+
+    if quote:
+        out.append('"')
+    repaired = "".join(out).rstrip()
+    if stack:
+        repaired = repaired.rstrip(",") + "".join(reversed(stack))
+    return repaired
+
+
+def parse_agent_output(text: str, model: type[ModelT], agent_name: str = "") -> ModelT:
+    """Validates the agent's JSON output against the given Pydantic model, repairing it locally if needed.
+
+    Raises:
+        AgentOutputError: The output can't be turned into a valid instance of the model
+    """
+    labels = {"agent": agent_name, "model": model.__name__}
+    try:
+        value = model.model_validate_json(strip_fences(text))
+    except ValidationError as error:
+        try:
+            value = model.model_validate_json(repair_json(text))
+        # The repair is best effort: whatever it trips over, the output is unrecoverable.
+        except Exception:
+            metrics.inc("learnie_agent_output_parses_total", {**labels, "result": "unrecoverable"})
+            raise AgentOutputError(f"Invalid {model.__name__} output: {error}", text) from error
+        metrics.inc("learnie_agent_output_parses_total", {**labels, "result": "repaired"})
+        return value
+    metrics.inc("learnie_agent_output_parses_total", {**labels, "result": "valid"})
+    return value
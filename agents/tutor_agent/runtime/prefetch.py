@@ -0,0 +1,264 @@
+"""Opt-in speculative generation of the subtopic materials a user is likely to open next.
+
+After a topic is created the materials of its first subtopics are generated in the background lane,
+and each time the user opens a subtopic the next ones are queued. The results go to the generation
+cache, so both the chat (`edu_materials_agent`) and `/materials/stream` serve them instantly.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Callable, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from .materials_pipeline import generate_subtopic_materials
+from .metrics import metrics
+from .parsing import parse_agent_output
+from .scheduler import BACKGROUND, lane
+from ..sub_agents.edu_materials_agent.types import Material
+from ..sub_agents.topic_creator_agent.types import Section, Subtopic, Topic
+from ..tools.image_cache import normalize_query
+from ..tools.session_materials import MATERIAL_OUTPUT_KEY, store_material
+
+logger = logging.getLogger(__name__)
+
+# Number of subtopics prefetched after a topic is created; 0 disables prefetching.
+PREFETCH_SUBTOPICS = int(os.environ.get("LEARNIE_PREFETCH_SUBTOPICS", "0"))
+# Number of following subtopics prefetched when the user opens a subtopic.
+PREFETCH_AHEAD = int(os.environ.get("LEARNIE_PREFETCH_AHEAD", "1"))
+# Maximum number of prefetched subtopics per session.
+PREFETCH_BUDGET = int(os.environ.get("LEARNIE_PREFETCH_BUDGET", "10"))
+# Prefetches of sessions without activity for this long are cancelled.
+PREFETCH_IDLE_SECONDS = float(os.environ.get("LEARNIE_PREFETCH_IDLE_SECONDS", "1800"))
+
+metrics.describe("learnie_prefetch_total", "counter", "Prefetched subtopic materials by outcome.")
+
+
+class SessionPrefetcher:
+    """Background materials generation for the subtopics of one session's topic, bounded by a budget."""
+
+    def __init__(self, session_id: str, topic: Topic, budget: int = PREFETCH_BUDGET):
+        self.session_id = session_id
+        self.topic = topic
+        self.budget = budget
+        self.touched = time.monotonic()
+        self._subtopics = [(section, subtopic) for section in topic.sections for subtopic in section.subtopics]
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    @property
+    def spent(self) -> int:
+        return len(self._tasks)
+
+    def find_subtopic(self, text: str) -> Optional[int]:
+        """Index of the subtopic whose title is mentioned in the text, preferring the longest title."""
+        text = normalize_query(text)
+        matches = [
+            (len(title), index)
+            for index, (_, subtopic) in enumerate(self._subtopics)
+            if (title := normalize_query(subtopic.title)) and title in text
+        ]
+        return max(matches)[1] if matches else None
+
+    def prefetch(self, count: int, after: Optional[int] = None) -> None:
+        """Starts generating the next `count` subtopics following the subtopic at index `after`."""
+        self.touched = time.monotonic()
+        start = 0 if after is None else after + 1
+        for section, subtopic in self._subtopics[start:start + count]:
+            self._start(section, subtopic)
+
+    def _start(self, section: Section, subtopic: Subtopic) -> None:
+        key = normalize_query(subtopic.title)
+        if key in self._tasks:
+            return
+        if self.spent >= self.budget:
+            metrics.inc("learnie_prefetch_total", {"outcome": "over_budget"})
+            return
+        task = self._tasks[key] = asyncio.get_running_loop().create_task(self._generate(section, subtopic))
+        task.add_done_callback(_discard_exception)
+
+    async def _generate(self, section: Section, subtopic: Subtopic) -> Material:
+        with lane(BACKGROUND):
+            try:
+                material = await generate_subtopic_materials(self.topic, section, subtopic)
+            except asyncio.CancelledError:
+                metrics.inc("learnie_prefetch_total", {"outcome": "cancelled"})
+                raise
+            except Exception:
+                metrics.inc("learnie_prefetch_total", {"outcome": "failed"})
+                logger.exception("Prefetch failed for %r", subtopic.title)
+                raise
+        metrics.inc("learnie_prefetch_total", {"outcome": "generated"})
+        return material
+
+    def ready(self, index: int) -> Optional[Material]:
+        """The material of the subtopic if its prefetch has finished successfully."""
+        task = self._tasks.get(normalize_query(self._subtopics[index][1].title))
+        if task is None or not task.done() or task.cancelled() or task.exception():
+            return None
+        return task.result()
+
+    def subtopic(self, index: int) -> tuple[Section, Subtopic]:
+        return self._subtopics[index]
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+
+
+def _discard_exception(task: asyncio.Task) -> None:
+    # The failure is logged by _generate; nobody may ask for the result, so retrieve it here.
+    if not task.cancelled():
+        task.exception()
+
+
+_prefetchers: dict[str, SessionPrefetcher] = {}
+_idle_check: Optional[asyncio.TimerHandle] = None
+
+
+def _cancel_idle() -> None:
+    now = time.monotonic()
+    for session_id, prefetcher in list(_prefetchers.items()):
+        if now - prefetcher.touched >= PREFETCH_IDLE_SECONDS:
+            cancel_prefetch(session_id)
+
+
+def _schedule_idle_check() -> None:
+    """Arms a timer for when the least recently touched session becomes idle, so quiet processes expire them too."""
+    global _idle_check
+    if _idle_check:
+        _idle_check.cancel()
+        _idle_check = None
+    if _prefetchers:
+        deadline = min(prefetcher.touched for prefetcher in _prefetchers.values()) + PREFETCH_IDLE_SECONDS
+        _idle_check = asyncio.get_running_loop().call_later(max(0.0, deadline - time.monotonic()), _check_idle)
+
+
+def _check_idle() -> None:
+    global _idle_check
+    _idle_check = None
+    _cancel_idle()
+    _schedule_idle_check()
+
+
+def start_prefetch(session_id: str, topic: Topic, subtopics: int = PREFETCH_SUBTOPICS) -> Optional[SessionPrefetcher]:
+    """Starts prefetching the first subtopics of the session's new topic, replacing any previous topic's prefetch."""
+    if subtopics <= 0:
+        return None
+    _cancel_idle()
+    cancel_prefetch(session_id)
+    prefetcher = _prefetchers[session_id] = SessionPrefetcher(session_id, topic)
+    prefetcher.prefetch(subtopics)
+    _schedule_idle_check()
+    return prefetcher
+
+
+def get_prefetcher(session_id: str) -> Optional[SessionPrefetcher]:
+    return _prefetchers.get(session_id)
+
+
+def cancel_prefetch(session_id: str) -> None:
+    """Cancels the session's outstanding prefetches; call it when the session ends."""
+    prefetcher = _prefetchers.pop(session_id, None)
+    if prefetcher:
+        prefetcher.cancel()
+
+
+def cancel_all_prefetches() -> None:
+    """Cancels the outstanding prefetches of every session, e.g. when the server shuts down."""
+    global _idle_check
+    for session_id in list(_prefetchers):
+        cancel_prefetch(session_id)
+    if _idle_check:
+        _idle_check.cancel()
+        _idle_check = None
+
+
+def _session_id(callback_context: CallbackContext) -> str:
+    # CallbackContext doesn't expose the session.
+    return callback_context._invocation_context.session.id
+
+
+def _final_output(callback_context: CallbackContext) -> Optional[str]:
+    """Final text the callback's agent produced in the current invocation.
+
+    Read from the session events rather than an `output_key`: events of agents transferred to
+    are saved under the output key of the agent that transferred.
+    """
+    context = callback_context._invocation_context
+    for event in reversed(context.session.events):
+        if event.invocation_id != context.invocation_id:
+            break
+        if event.author == callback_context.agent_name and event.is_final_response() and event.content:
+            return "".join(part.text or "" for part in event.content.parts or [])
+    return None
+
+
+def _user_text(callback_context: CallbackContext) -> str:
+    content = callback_context.user_content
+    return "".join(part.text or "" for part in (content.parts if content else []) or [])
+
+
+def prefetch_topic_materials(callback_context: CallbackContext) -> None:
+    """after_agent_callback of `topic_creator_agent`: starts prefetching the new topic's first subtopics."""
+    output = _final_output(callback_context)
+    if not output:
+        return None
+    try:
+        topic = parse_agent_output(output, Topic, callback_context.agent_name)
+    except ValueError as e:
+        logger.warning("Not prefetching, invalid topic: %s", e)
+        return None
+    start_prefetch(_session_id(callback_context), topic)
+    return None
+
+
+def serve_prefetched_materials(callback_context: CallbackContext) -> Optional[types.Content]:
+    """before_agent_callback of `edu_materials_agent`: answers with the prefetched material of the requested subtopic."""
+    prefetcher = get_prefetcher(_session_id(callback_context))
+    if prefetcher is None:
+        return None
+    index = prefetcher.find_subtopic(_user_text(callback_context))
+    if index is None:
+        return None
+    prefetcher.prefetch(PREFETCH_AHEAD, after=index)
+    material = prefetcher.ready(index)
+    if material is None:
+        metrics.inc("learnie_prefetch_total", {"outcome": "missed"})
+        return None
+    metrics.inc("learnie_prefetch_total", {"outcome": "served"})
+    output = material.model_dump_json(exclude_none=True)
+    section, subtopic = prefetcher.subtopic(index)
+    callback_context.state[MATERIAL_OUTPUT_KEY] = output
+    store_material(callback_context.state, prefetcher.topic.title, section.title, subtopic.title, json.loads(output))
+    return types.Content(role="model", parts=[types.Part(text=output)])
+
+
+def _chain(first: Callable, second: Optional[Callable]) -> Callable:
+    if second is None:
+        return first
+
+    def chained(callback_context: CallbackContext):
+        return first(callback_context=callback_context) or second(callback_context=callback_context)
+
+    return chained
+
+
+def install_prefetch(root: BaseAgent) -> BaseAgent:
+    """Wires the prefetch callbacks onto `topic_creator_agent` and `edu_materials_agent` of the agent tree.
+
+    Does nothing unless LEARNIE_PREFETCH_SUBTOPICS is set to a positive number.
+    """
+    if PREFETCH_SUBTOPICS <= 0:
+        return root
+    topic_agent = root.find_agent("topic_creator_agent")
+    materials_agent = root.find_agent("edu_materials_agent")
+    if topic_agent:
+        topic_agent.after_agent_callback = _chain(prefetch_topic_materials, topic_agent.after_agent_callback)
+    if materials_agent:
+        materials_agent.before_agent_callback = _chain(serve_prefetched_materials, materials_agent.before_agent_callback)
+    return root
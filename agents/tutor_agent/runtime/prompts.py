@@ -0,0 +1,188 @@
+"""Prompt assembly: splits every model request into its static instruction prefix and per-request parts,
+counts their tokens offline and enforces per-agent prompt token budgets.
+
+The static prefix is the system instruction ADK builds from the agent definition (identity, instruction,
+transfer targets); the dynamic part is what callbacks append per request (e.g. the material context),
+followed by the conversation contents.
+"""
+
+import functools
+import math
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from google.adk.agents import Agent, BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from .metrics import metrics
+
+DEFAULT_TOKEN_BUDGET = 32_000
+CHARS_PER_TOKEN = 4
+# "report" only counts the requests over budget, "cap" also drops the oldest turns until the prompt fits.
+BUDGET_MODES = ("report", "cap")
+
+metrics.describe("learnie_prompt_tokens_total", "counter", "Prompt tokens sent to the model by part: static, dynamic or history.")
+metrics.describe("learnie_prompt_tokens_max", "gauge", "Largest prompt of an agent, in tokens.")
+metrics.describe("learnie_prompt_token_budget", "gauge", "Prompt token budget of an agent.")
+metrics.describe("learnie_prompt_over_budget_total", "counter", "Model requests whose prompt exceeded the agent's budget.")
+metrics.describe("learnie_prompt_trimmed_contents_total", "counter", "History contents dropped to fit the budget.")
+
+
+def estimate_tokens(text: str) -> int:
+    """Offline token estimate of a text, about four characters per Gemini token."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def content_tokens(content: types.Content) -> int:
+    tokens = 0
+    for part in content.parts or []:
+        if part.text:
+            tokens += estimate_tokens(part.text)
+        elif part.function_call or part.function_response:
+            tokens += estimate_tokens(str(part.function_call or part.function_response))
+    return tokens
+
+
+def _instruction_text(system_instruction: Any) -> str:
+    return system_instruction if isinstance(system_instruction, str) else ""
+
+
+@dataclass
+class PromptParts:
+    static: str
+    dynamic: str
+    contents: list[types.Content]
+
+    def tokens(self) -> dict[str, int]:
+        return {
+            "static": estimate_tokens(self.static),
+            "dynamic": estimate_tokens(self.dynamic),
+            "history": sum(content_tokens(content) for content in self.contents),
+        }
+
+
+class PromptAssembly:
+    """Static instruction prefixes of the agents, learnt from their requests, and their token budgets."""
+
+    def __init__(self, budgets: Optional[dict[str, int]] = None, default_budget: int = DEFAULT_TOKEN_BUDGET,
+                 mode: str = "report"):
+        if mode not in BUDGET_MODES:
+            raise ValueError(f"Unknown prompt budget mode '{mode}', expected one of {BUDGET_MODES}")
+        self.budgets = budgets or {}
+        self.default_budget = default_budget
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._prefixes: dict[str, str] = {}
+        self._max_tokens: dict[str, int] = {}
+        metrics.register_collector(self._samples)
+
+    def budget(self, agent_name: str) -> int:
+        return self.budgets.get(agent_name, self.default_budget)
+
+    def register_static_prefix(self, agent_name: str, llm_request: LlmRequest) -> None:
+        """Records the instruction ADK built for the agent, before its callbacks append per-request parts."""
+        prefix = _instruction_text(llm_request.config.system_instruction if llm_request.config else None)
+        if prefix:
+            with self._lock:
+                self._prefixes[agent_name] = prefix
+
+    def split(self, llm_request: LlmRequest) -> PromptParts:
+        """Splits the request at the longest known static prefix its system instruction starts with."""
+        instruction = _instruction_text(llm_request.config.system_instruction if llm_request.config else None)
+        with self._lock:
+            prefixes = list(self._prefixes.values())
+        static = max((prefix for prefix in prefixes if instruction.startswith(prefix)), key=len, default="")
+        return PromptParts(static, instruction[len(static):].lstrip("\n"), llm_request.contents)
+
+    def enforce_budget(self, agent_name: str, llm_request: LlmRequest) -> None:
+        """Counts the prompt tokens of the request and, in "cap" mode, trims the oldest history to fit the budget."""
+        labels = {"agent": agent_name}
+        tokens = self.split(llm_request).tokens()
+        total = sum(tokens.values())
+        budget = self.budget(agent_name)
+        if total > budget:
+            metrics.inc("learnie_prompt_over_budget_total", labels)
+            if self.mode == "cap":
+                removed, saved = trim_history(llm_request.contents, total - budget)
+                metrics.inc("learnie_prompt_trimmed_contents_total", labels, removed)
+                tokens["history"] -= saved
+        for part, count in tokens.items():
+            metrics.inc("learnie_prompt_tokens_total", {**labels, "part": part}, count)
+        with self._lock:
+            self._max_tokens[agent_name] = max(self._max_tokens.get(agent_name, 0), sum(tokens.values()))
+
+    def _samples(self):
+        with self._lock:
+            agents = set(self._prefixes) | set(self.budgets)
+            max_tokens = dict(self._max_tokens)
+        for agent_name in agents:
+            yield "learnie_prompt_token_budget", {"agent": agent_name}, self.budget(agent_name)
+        for agent_name, tokens in max_tokens.items():
+            yield "learnie_prompt_tokens_max", {"agent": agent_name}, tokens
+
+
+def _starts_turn(content: types.Content) -> bool:
+    return content.role == "user" and not any(part.function_response for part in content.parts or [])
+
+
+def trim_history(contents: list[types.Content], excess_tokens: int) -> tuple[int, int]:
+    """Drops the oldest contents until `excess_tokens` are saved, keeping the latest turn.
+
+    The history always restarts at a user message, so a function response never loses its call.
+
+    Returns:
+        (number of dropped contents, tokens saved)
+    """
+    turns = [index for index, content in enumerate(contents) if index > 0 and _starts_turn(content)]
+    cut, saved = 0, 0
+    for index in turns:
+        if saved >= excess_tokens:
+            break
+        saved += sum(content_tokens(content) for content in contents[cut:index])
+        cut = index
+    del contents[:cut]
+    return cut, saved
+
+
+def _parse_budgets(text: str) -> dict[str, int]:
+    return {name: int(tokens) for name, tokens in (item.split("=") for item in text.split(",") if item)}
+
+
+@functools.cache
+def get_prompt_assembly() -> PromptAssembly:
+    """Returns the process-wide prompt assembly configured via PROMPT_TOKEN_BUDGET(S) and PROMPT_BUDGET_MODE.
+
+    PROMPT_TOKEN_BUDGETS overrides the default budget per agent, e.g. "tutor_agent=48000,edu_quiz_developer=8000".
+    """
+    return PromptAssembly(
+        budgets=_parse_budgets(os.environ.get("PROMPT_TOKEN_BUDGETS", "")),
+        default_budget=int(os.environ.get("PROMPT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET)),
+        mode=os.environ.get("PROMPT_BUDGET_MODE", "report"),
+    )
+
+
+def _wrap(callback: Optional[Callable]) -> Callable:
+    def before_model(callback_context: CallbackContext, llm_request: LlmRequest):
+        assembly = get_prompt_assembly()
+        assembly.register_static_prefix(callback_context.agent_name, llm_request)
+        result = callback(callback_context=callback_context, llm_request=llm_request) if callback else None
+        if result is None:
+            assembly.enforce_budget(callback_context.agent_name, llm_request)
+        return result
+
+    return before_model
+
+
+def install_prompt_assembly(agent: BaseAgent) -> BaseAgent:
+    """Wraps the before_model_callback of the agent and its sub-agents: the static prefix is recorded
+    before the agent's own callback runs, the budget is enforced on the final request after it."""
+    if isinstance(agent, Agent) and not getattr(agent, "_prompt_assembly", False):
+        object.__setattr__(agent, "_prompt_assembly", True)
+        agent.before_model_callback = _wrap(agent.before_model_callback)
+    for sub_agent in agent.sub_agents:
+        install_prompt_assembly(sub_agent)
+    return agent
@@ -0,0 +1,70 @@
+"""Quizzes for the subtopics of a topic, generated in one concurrent pass and cached alongside the materials."""
+
+import json
+from typing import AsyncIterator, Optional
+
+from .generation_cache import cached_generation
+from .materials_pipeline import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_TIMEOUT_SECONDS,
+    SubtopicResult,
+    for_each_subtopic,
+    generate_subtopic_materials,
+)
+from .runner import run_agent_output
+from ..registry import get_agent
+from ..sub_agents.edu_materials_agent.types import Material
+from ..sub_agents.edu_quiz_developer.types import Quiz
+from ..sub_agents.topic_creator_agent.types import Section, Subtopic, Topic
+from ..tools.session_materials import material_digest
+
+
+def quiz_request(topic_title: str, section_title: str, subtopic: Subtopic, material: Optional[Material] = None) -> str:
+    """Builds the user input for `edu_quiz_developer`; the quiz is based on the material digest when given."""
+    request = f'Topic: "{topic_title}"\nSection: "{section_title}"\nSubtopic: "{subtopic.title}"'
+    if subtopic.summary:
+        request += f'\nSubtopic summary: "{subtopic.summary}"'
+    if material:
+        request += f"\nMaterial: {json.dumps(material_digest(material.model_dump()))}"
+    return request
+
+
+async def generate_subtopic_quiz(
+        topic: Topic,
+        section: Section,
+        subtopic: Subtopic,
+        regenerate: bool = False,
+) -> Quiz:
+    """Generates the quiz for a single subtopic from its materials, both served from the generation cache when possible.
+
+    `regenerate` only refreshes the quiz; the materials it's based on are kept.
+    """
+    material = await generate_subtopic_materials(topic, section, subtopic)
+    request = quiz_request(topic.title, section.title, subtopic, material)
+    agent = get_agent("edu_quiz_developer")
+
+    async def generate() -> Quiz:
+        return await run_agent_output(agent, request, Quiz)
+
+    return await cached_generation(agent, request, Quiz, generate, regenerate=regenerate)
+
+
+def generate_topic_quizzes(
+        topic: Topic,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        regenerate: bool = False,
+) -> AsyncIterator[SubtopicResult]:
+    """Generates quizzes for all subtopics of the topic concurrently, see `for_each_subtopic`.
+
+    Missing materials are generated first, so a run over a fresh topic also warms the materials cache.
+
+    Yields:
+        SubtopicResult with the Quiz as `result`, in order of completion
+    """
+    return for_each_subtopic(
+        topic,
+        lambda section, subtopic: generate_subtopic_quiz(topic, section, subtopic, regenerate),
+        concurrency,
+        timeout,
+    )
@@ -0,0 +1,83 @@
+"""Helpers for running a single agent programmatically, outside of a chat session."""
+
+import logging
+import uuid
+from typing import AsyncIterator, Optional
+
+from google.adk.agents import Agent
+from google.adk.agents.run_config import RunConfig
+from google.adk.events import Event
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from .metrics import metrics
+from .parsing import AgentOutputError, ModelT, parse_agent_output
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = "tutor_agent"
+USER_ID = "pipeline"
+
+# Model runs repeated when the output can't be repaired into the expected model.
+OUTPUT_RETRIES = 1
+
+_runners: dict[str, InMemoryRunner] = {}
+
+
+def _get_runner(agent: Agent) -> InMemoryRunner:
+    """Returns a runner for a detached copy of the agent, so it can't hand control back to its parent."""
+    if agent.name not in _runners:
+        standalone = agent.model_copy(update={
+            "parent_agent": None,
+            "disallow_transfer_to_parent": True,
+            "disallow_transfer_to_peers": True,
+        })
+        _runners[agent.name] = InMemoryRunner(agent=standalone, app_name=APP_NAME)
+    return _runners[agent.name]
+
+
+async def stream_agent(agent: Agent, text: str, run_config: Optional[RunConfig] = None) -> AsyncIterator[Event]:
+    """Runs the agent on a single user message in a throwaway session and yields its events."""
+    runner = _get_runner(agent)
+    session = runner.session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=uuid.uuid4().hex)
+    message = types.Content(role="user", parts=[types.Part(text=text)])
+    try:
+        async for event in runner.run_async(
+            user_id=USER_ID,
+            session_id=session.id,
+            new_message=message,
+            run_config=run_config or RunConfig(),
+        ):
+            yield event
+    finally:
+        runner.session_service.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=session.id)
+
+
+def event_text(event: Event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text for part in event.content.parts if part.text)
+
+
+async def run_agent(agent: Agent, text: str) -> str:
+    """Runs the agent on a single user message and returns the text of its final response."""
+    final_text = ""
+    async for event in stream_agent(agent, text):
+        if event.is_final_response() and event.author == agent.name:
+            final_text += event_text(event)
+    return final_text
+
+
+async def run_agent_output(agent: Agent, text: str, model: type[ModelT], retries: int = OUTPUT_RETRIES) -> ModelT:
+    """Runs the agent and parses its final response into the model.
+
+    Almost-JSON is repaired locally; the agent only runs again when its output is unrecoverable.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return parse_agent_output(await run_agent(agent, text), model, agent.name)
+        except AgentOutputError as e:
+            if attempt == retries:
+                raise
+            metrics.inc("learnie_agent_output_retries_total", {"agent": agent.name})
+            logger.warning("Retrying %s after unrecoverable output: %s", agent.name, e)
@@ -0,0 +1,64 @@
+"""Gemini model whose calls go through the upstream scheduler."""
+
+import logging
+import re
+from typing import AsyncGenerator, Optional
+
+from google.adk.models import Gemini, LLMRegistry
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import errors
+
+from .context_cache import apply_context_cache, context_cache_enabled, get_gemini_context_cache
+from .scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+MAX_THROTTLE_RETRIES = 3
+
+_RETRY_DELAY = re.compile(r'"retryDelay":\s*"(\d+(?:\.\d+)?)s"')
+
+
+def _retry_after(error: errors.APIError) -> Optional[float]:
+    """The retry delay Gemini suggests in the RetryInfo details of a 429."""
+    match = _RETRY_DELAY.search(str(error.details))
+    return float(match.group(1)) if match else None
+
+
+class ScheduledGemini(Gemini):
+    """Waits for a rate-limit token before every request and backs off on 429.
+
+    A throttled request is retried only before the first response was yielded, so a partial
+    streamed generation is never thrown away and repeated. With GEMINI_CONTEXT_CACHE=1 the static
+    prompt prefix is sent as cached content.
+    """
+
+    async def generate_content_async(
+            self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if context_cache_enabled():
+            await apply_context_cache(llm_request, get_gemini_context_cache(self.api_client))
+        scheduler = get_scheduler("gemini")
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            await scheduler.acquire()
+            started = False
+            try:
+                async for response in super().generate_content_async(llm_request, stream):
+                    started = True
+                    yield response
+            except errors.ClientError as e:
+                if e.code != 429:
+                    raise
+                pause = scheduler.throttled(_retry_after(e))
+                if started or attempt == MAX_THROTTLE_RETRIES:
+                    raise
+                logger.warning("Gemini quota exceeded, retrying in %.1fs", pause)
+                continue
+            scheduler.succeeded()
+            return
+
+
+def register_scheduled_gemini() -> None:
+    """Resolves all Gemini model names used by the agents to `ScheduledGemini`."""
+    LLMRegistry.register(ScheduledGemini)
+    LLMRegistry.resolve.cache_clear()
@@ -0,0 +1,201 @@
+"""Token-bucket rate limiting of upstream calls (Gemini, Brave) with priority lanes and adaptive 429 backoff."""
+
+import asyncio
+import bisect
+import contextlib
+import functools
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Iterator, Optional, Union
+
+from .metrics import metrics
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)
+
+# Upstream request rates per minute; override with <UPSTREAM>_REQUESTS_PER_MINUTE and <UPSTREAM>_BURST, 0 disables.
+DEFAULT_REQUESTS_PER_MINUTE = {"gemini": 1000, "brave": 60}
+
+MIN_RATE_FACTOR = 0.1
+RECOVERY_PER_SUCCESS = 0.05
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+MIN_POLL_SECONDS = 0.005
+
+# A waiting call in a shared lane checks at least this often whether the lane was promoted.
+SHARED_LANE_POLL_SECONDS = 0.05
+
+metrics.describe("learnie_scheduler_wait_seconds", "histogram", "Time calls waited for an upstream rate-limit token.")
+metrics.describe("learnie_scheduler_throttled_total", "counter", "429 responses reported by upstreams.")
+metrics.describe("learnie_scheduler_queue_depth", "gauge", "Calls waiting for a rate-limit token.")
+metrics.describe("learnie_scheduler_rate_factor", "gauge", "Current fraction of the configured rate after 429 backoff.")
+
+
+class SharedLane:
+    """Lane of work done on behalf of several callers, e.g. a coalesced generation: the most urgent caller's.
+
+    Calls already waiting for a token move to the new lane when a more urgent caller joins.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def join(self, name: str) -> None:
+        if LANES.index(name) < LANES.index(self.name):
+            self.name = name
+
+
+_lane: ContextVar[Union[str, SharedLane]] = ContextVar("learnie_scheduler_lane", default=INTERACTIVE)
+
+
+def _lane_name(value: Union[str, SharedLane]) -> str:
+    return value.name if isinstance(value, SharedLane) else value
+
+
+def current_lane() -> str:
+    return _lane_name(_lane.get())
+
+
+@contextlib.contextmanager
+def lane(name: Union[str, SharedLane]) -> Iterator[None]:
+    """Runs the upstream calls made inside the block (and tasks created in it) in the given lane."""
+    token = _lane.set(name)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class TokenBucketScheduler:
+    """Grants upstream calls at a steady rate, interactive callers before background ones.
+
+    Within a lane, callers are served in arrival order. On a 429 the scheduler pauses all calls
+    (honouring the upstream's retry delay) and halves its rate; each success restores part of it.
+    Thread-safe and usable from several event loops, waiting is done by sleeping until the next token.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, burst: Optional[float] = None):
+        self.name = name
+        self.rate = requests_per_minute / 60.0
+        self.burst = burst if burst is not None else max(1.0, self.rate)
+        self.rate_factor = 1.0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._consecutive_throttles = 0
+        self._lock = threading.Lock()
+        self._tickets = itertools.count()
+        self._queues: dict[str, deque[int]] = {name: deque() for name in LANES}
+        metrics.register_collector(self._samples)
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate * self.rate_factor)
+        self._updated = now
+
+    def _is_next(self, lane_name: str, ticket: int) -> bool:
+        for name in LANES:
+            if name == lane_name:
+                return self._queues[name][0] == ticket
+            if self._queues[name]:
+                return False
+        return False
+
+    def _wait_seconds(self, now: float, position: int) -> float:
+        token_wait = (position + 1 - self._tokens) / (self.rate * self.rate_factor)
+        return max(MIN_POLL_SECONDS, self._paused_until - now, token_wait)
+
+    async def acquire(self, lane_name: Optional[str] = None) -> None:
+        """Waits until the caller may send its request. The lane defaults to the one of the current context."""
+        if not self.enabled:
+            return
+        lane_value = lane_name or _lane.get()
+        lane_name = _lane_name(lane_value)
+        if lane_name not in self._queues:
+            raise ValueError(f"Unknown scheduler lane '{lane_name}', expected one of {LANES}")
+        started = time.monotonic()
+        with self._lock:
+            ticket = next(self._tickets)
+            queue = self._queues[lane_name]
+            queue.append(ticket)
+        try:
+            while True:
+                with self._lock:
+                    if _lane_name(lane_value) != lane_name:
+                        # Promoted shared lane: keep the arrival order within the new lane.
+                        queue.remove(ticket)
+                        lane_name = _lane_name(lane_value)
+                        queue = self._queues[lane_name]
+                        bisect.insort(queue, ticket)
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now >= self._paused_until and self._tokens >= 1 and self._is_next(lane_name, ticket):
+                        self._tokens -= 1
+                        queue.popleft()
+                        break
+                    ahead = sum(len(self._queues[name]) for name in LANES[:LANES.index(lane_name)])
+                    wait = self._wait_seconds(now, ahead + queue.index(ticket))
+                if isinstance(lane_value, SharedLane):
+                    wait = min(wait, SHARED_LANE_POLL_SECONDS)
+                await asyncio.sleep(wait)
+        except BaseException:
+            with self._lock:
+                if ticket in queue:
+                    queue.remove(ticket)
+            raise
+        metrics.observe("learnie_scheduler_wait_seconds", {"upstream": self.name, "lane": lane_name},
+                        time.monotonic() - started)
+
+    def throttled(self, retry_after: Optional[float] = None) -> float:
+        """Reports a 429: pauses all calls and halves the rate. Returns the pause in seconds."""
+        metrics.inc("learnie_scheduler_throttled_total", {"upstream": self.name})
+        with self._lock:
+            self._consecutive_throttles += 1
+            backoff = min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** (self._consecutive_throttles - 1))
+            pause = max(retry_after or 0.0, backoff)
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self.rate_factor = max(MIN_RATE_FACTOR, self.rate_factor / 2)
+            self._tokens = min(self._tokens, 0.0)
+        return pause
+
+    def succeeded(self) -> None:
+        """Reports a successful call, gradually restoring the rate after 429s."""
+        with self._lock:
+            self._consecutive_throttles = 0
+            self.rate_factor = min(1.0, self.rate_factor + RECOVERY_PER_SUCCESS)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": {name: len(queue) for name, queue in self._queues.items()},
+                "rate_factor": self.rate_factor,
+                "paused_seconds": max(0.0, self._paused_until - time.monotonic()),
+            }
+
+    def _samples(self):
+        stats = self.stats()
+        for name, depth in stats["queue_depth"].items():
+            yield "learnie_scheduler_queue_depth", {"upstream": self.name, "lane": name}, depth
+        yield "learnie_scheduler_rate_factor", {"upstream": self.name}, stats["rate_factor"]
+
+
+@functools.cache
+def get_scheduler(upstream: str) -> TokenBucketScheduler:
+    """Returns the process-wide scheduler of an upstream configured via environment variables."""
+    prefix = upstream.upper()
+    burst = os.environ.get(f"{prefix}_BURST")
+    return TokenBucketScheduler(
+        upstream,
+        requests_per_minute=float(os.environ.get(
+            f"{prefix}_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE.get(upstream, 0)
+        )),
+        burst=float(burst) if burst else None,
+    )
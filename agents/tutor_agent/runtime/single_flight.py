@@ -0,0 +1,70 @@
+"""Coalescing of concurrent identical generations into one shared in-flight call."""
+
+import asyncio
+import weakref
+from typing import Awaitable, Callable, TypeVar
+
+from .metrics import metrics
+from .scheduler import SharedLane, current_lane, lane
+
+T = TypeVar("T")
+
+metrics.describe("learnie_single_flight_calls_total", "counter", "Generation calls by role: leader (ran it) or coalesced (joined it).")
+metrics.describe("learnie_single_flight_in_flight", "gauge", "Generations currently in flight.")
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers with the same key share its result.
+
+    The shared call runs as its own task and callers await it through `asyncio.shield`, so a caller
+    being cancelled (e.g. a client disconnecting) doesn't cancel the work the others are waiting for.
+    Its upstream calls run in the most urgent scheduler lane among the callers: an interactive request
+    joining a background prefetch promotes it. An exception is delivered to every caller of the flight,
+    the next call with the key starts a new one.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # Tasks are bound to their event loop, so each loop has its own flights.
+        self._flights: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Task]] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lanes: weakref.WeakKeyDictionary[asyncio.Task, SharedLane] = weakref.WeakKeyDictionary()
+        metrics.register_collector(self._samples)
+
+    def _loop_flights(self) -> dict[str, asyncio.Task]:
+        loop = asyncio.get_running_loop()
+        flights = self._flights.get(loop)
+        if flights is None:
+            flights = self._flights[loop] = {}
+        return flights
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Awaits the in-flight call for `key`, or starts `call` as the new flight for it."""
+        flights = self._loop_flights()
+        task = flights.get(key)
+        if task is None:
+            metrics.inc("learnie_single_flight_calls_total", {"flight": self.name, "role": "leader"})
+            shared_lane = SharedLane(current_lane())
+            with lane(shared_lane):
+                task = flights[key] = asyncio.ensure_future(call())
+            self._lanes[task] = shared_lane
+            task.add_done_callback(lambda done: self._finish(flights, key, done))
+        else:
+            metrics.inc("learnie_single_flight_calls_total", {"flight": self.name, "role": "coalesced"})
+            self._lanes[task].join(current_lane())
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _finish(flights: dict[str, asyncio.Task], key: str, task: asyncio.Task) -> None:
+        if flights.get(key) is task:
+            del flights[key]
+        # Nobody may be waiting anymore; retrieve the exception so it isn't reported as never retrieved.
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return sum(len(flights) for flights in list(self._flights.values()))
+
+    def _samples(self):
+        yield "learnie_single_flight_in_flight", {"flight": self.name}, self.in_flight()
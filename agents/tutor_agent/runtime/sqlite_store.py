@@ -0,0 +1,34 @@
+"""SQLite files shared by the worker processes: the caches and the topic library."""
+
+import os
+import sqlite3
+import threading
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "learnie")
+
+
+def default_path(file_name: str) -> str:
+    """Path of a SQLite file in the local learnie cache directory."""
+    return os.path.join(CACHE_DIR, file_name)
+
+
+class SQLiteStore:
+    """One connection per thread to a SQLite file, whose schema is created when the store is opened.
+
+    The file runs in WAL mode, so several worker processes can read it while one of them writes.
+    """
+
+    def __init__(self, path: str, schema: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection().execute(schema)
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
@@ -0,0 +1,236 @@
+"""Incremental parsing of streamed agent output into sections / material blocks, served as SSE."""
+
+import json
+import logging
+from typing import AsyncIterator, Callable, Generic, Iterator, Optional, TypeVar
+
+from google.adk.agents import Agent
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from pydantic import BaseModel
+
+from .generation_cache import generation_key, get_generation_cache
+from .parsing import AgentOutputError, parse_agent_output
+from .runner import event_text, stream_agent
+from ..sub_agents.edu_materials_agent.types import Material, MaterialBlock
+from ..sub_agents.topic_creator_agent.types import Section, Topic
+
+logger = logging.getLogger(__name__)
+
+ItemT = TypeVar("ItemT", bound=BaseModel)
+
+_IDENTIFIER_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$")
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "start", "current_key")
+
+    def __init__(self, kind: str, key: Optional[str], start: int):
+        self.kind = kind
+        self.key = key
+        self.start = start
+        self.current_key: Optional[str] = None
+
+
+class IncrementalItemParser(Generic[ItemT]):
+    """Yields the elements of a top-level array (e.g. `sections`) as soon as each one is closed.
+
+    The parser only tracks nesting, strings and keys, so feeding a chunk costs time proportional
+    to the chunk size. Bare (unquoted) keys are recognized as well, since the models emit them.
+    """
+
+    def __init__(self, array_key: str, item_model: type[ItemT]):
+        self.array_key = array_key
+        self.item_model = item_model
+        self.buffer = ""
+        self.errors: list[str] = []
+        self._stack: list[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string = ""
+        self._bare = ""
+        self._last_token: Optional[str] = None
+
+    def feed(self, chunk: str) -> list[ItemT]:
+        """Consumes the next chunk of model output and returns the items completed by it."""
+        offset = len(self.buffer)
+        self.buffer += chunk
+        items = []
+        for index, char in enumerate(chunk, start=offset):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_token = self._string
+                else:
+                    self._string += char
+                continue
+
+            if char in _IDENTIFIER_CHARS:
+                self._bare += char
+                continue
+            if self._bare:
+                self._last_token, self._bare = self._bare, ""
+
+            if char == '"':
+                self._in_string = True
+                self._string = ""
+            elif char == ":":
+                if self._stack and self._stack[-1].kind == "{":
+                    self._stack[-1].current_key = self._last_token
+            elif char in "{[":
+                self._stack.append(_Frame(char, self._child_key(), index))
+            elif char in "}]" and self._stack:
+                frame = self._stack.pop()
+                if frame.kind == "{" and self._is_target_array():
+                    item = self._parse_item(self.buffer[frame.start:index + 1])
+                    if item is not None:
+                        items.append(item)
+        return items
+
+    def _child_key(self) -> Optional[str]:
+        if not self._stack:
+            return None
+        parent = self._stack[-1]
+        return parent.current_key if parent.kind == "{" else parent.key
+
+    def _is_target_array(self) -> bool:
+        return (
+            len(self._stack) == 2
+            and self._stack[0].kind == "{"
+            and self._stack[1].kind == "["
+            and self._stack[1].key == self.array_key
+        )
+
+    def _parse_item(self, text: str) -> Optional[ItemT]:
+        try:
+            return parse_agent_output(text, self.item_model)
+        except AgentOutputError as e:
+            self.errors.append(str(e))
+            logger.warning("Skipping invalid streamed %s item: %s", self.array_key, e)
+            return None
+
+
+def format_sse(event: str, data: BaseModel | dict | str) -> str:
+    """Formats a single server-sent event."""
+    if isinstance(data, BaseModel):
+        payload = data.model_dump_json()
+    elif isinstance(data, dict):
+        payload = json.dumps(data)
+    else:
+        payload = data
+    lines = "".join(f"data: {line}\n" for line in payload.splitlines() or [""])
+    return f"event: {event}\n{lines}\n"
+
+
+async def stream_items(
+        agent: Agent,
+        text: str,
+        array_key: str,
+        item_model: type[ItemT],
+) -> AsyncIterator[tuple[str, BaseModel | str]]:
+    """Runs the agent with SSE streaming and yields ("item", item) for every completed array element,
+    followed by ("final", full_text) once the agent has finished.
+
+    An item is only yielded once, even if the model writes it again after a tool call.
+    """
+    parser = IncrementalItemParser(array_key, item_model)
+    sent: set[str] = set()
+    final_text = ""
+
+    def new_items(chunk: str) -> Iterator[ItemT]:
+        for item in parser.feed(chunk):
+            key = item.model_dump_json()
+            if key not in sent:
+                sent.add(key)
+                yield item
+
+    async for event in stream_agent(agent, text, RunConfig(streaming_mode=StreamingMode.SSE)):
+        if event.author != agent.name:
+            continue
+        if event.partial:
+            for item in new_items(event_text(event)):
+                yield "item", item
+        elif event.is_final_response():
+            final_text = event_text(event)
+            if not parser.buffer:
+                for item in new_items(final_text):
+                    yield "item", item
+        else:
+            # A tool-call turn ended; the JSON answer comes in the next model turn.
+            parser = IncrementalItemParser(array_key, item_model)
+    yield "final", final_text
+
+
+def _replay_events(
+        output: BaseModel,
+        array_key: str,
+        item_event: str,
+        output_event: str,
+        on_output: Optional[Callable[[BaseModel], None]],
+) -> Iterator[str]:
+    for item in getattr(output, array_key):
+        yield format_sse(item_event, item)
+    if on_output:
+        on_output(output)
+    yield format_sse(output_event, output)
+
+
+async def _stream_events(
+        agent: Agent,
+        request: str,
+        array_key: str,
+        item_model: type[BaseModel],
+        output_model: type[BaseModel],
+        item_event: str,
+        output_event: str,
+        regenerate: bool,
+        on_output: Optional[Callable[[BaseModel], None]],
+) -> AsyncIterator[str]:
+    cache = get_generation_cache()
+    key = generation_key(agent, request)
+    cached = None if regenerate else cache.get(key, output_model)
+    if cached is not None:
+        for event in _replay_events(cached, array_key, item_event, output_event, on_output):
+            yield event
+        return
+
+    async for kind, value in stream_items(agent, request, array_key, item_model):
+        if kind == "item":
+            yield format_sse(item_event, value)
+            continue
+        try:
+            output = parse_agent_output(value, output_model, agent.name)
+        except AgentOutputError as e:
+            yield format_sse("error", {"message": str(e)})
+        else:
+            cache.set(key, agent.name, output)
+            if on_output:
+                on_output(output)
+            yield format_sse(output_event, output)
+
+
+def stream_topic_events(
+        agent: Agent,
+        request: str,
+        regenerate: bool = False,
+        on_output: Optional[Callable[[Topic], None]] = None,
+) -> AsyncIterator[str]:
+    """Streams `section` events while the topic is generated, then a `topic` (or `error`) event.
+
+    `on_output` is called with the validated topic before the `topic` event is sent.
+    """
+    return _stream_events(agent, request, "sections", Section, Topic, "section", "topic", regenerate, on_output)
+
+
+async def replay_topic_events(topic: Topic, on_output: Optional[Callable[[Topic], None]] = None) -> AsyncIterator[str]:
+    """The events of `stream_topic_events` for an already existing topic."""
+    for event in _replay_events(topic, "sections", "section", "topic", on_output):
+        yield event
+
+
+def stream_material_events(agent: Agent, request: str, regenerate: bool = False) -> AsyncIterator[str]:
+    """Streams `block` events while the material is generated, then a `material` (or `error`) event."""
+    return _stream_events(agent, request, "material", MaterialBlock, Material, "block", "material", regenerate, None)
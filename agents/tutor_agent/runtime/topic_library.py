@@ -0,0 +1,250 @@
+"""Persistent library of generated topics with an offline TF-IDF similarity index over the learning requests."""
+
+import functools
+import heapq
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Optional
+
+from .metrics import metrics
+from .sqlite_store import SQLiteStore, default_path
+from ..sub_agents.topic_creator_agent.types import Topic
+from ..tools.image_cache import normalize_query
+
+DEFAULT_LIBRARY_PATH = default_path("topic_library.sqlite3")
+DEFAULT_REUSE_THRESHOLD = 0.6
+DEFAULT_SEED_THRESHOLD = 0.4
+# Rows written by other processes are picked up at most this often.
+REFRESH_INTERVAL_SECONDS = 5.0
+# Document vectors are recomputed with fresh IDF weights once the library grew by this fraction.
+REWEIGHT_GROWTH = 0.1
+ACRONYM_WEIGHT = 0.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  request TEXT NOT NULL,
+  topic TEXT NOT NULL,
+  created_at REAL NOT NULL
+)
+"""
+
+_STOPWORDS = frozenset(
+    "a an and about are as at be basics by can do for from get how i in into intro introduction is it know learn "
+    "learning like me more my of on or please some teach the to understand want wanna what with would you your".split()
+)
+
+metrics.describe("learnie_topic_library_lookups_total", "counter", "Topic library lookups by result: reuse, seed or miss.")
+metrics.describe("learnie_topic_library_topics", "gauge", "Topics in the library index.")
+
+
+def _stem(word: str) -> str:
+    for suffix, replacement in (("ies", "y"), ("ing", ""), ("ed", ""), ("es", ""), ("s", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def terms(text: str) -> tuple[Counter, Counter]:
+    """Stemmed content words of a text, and the acronyms of its adjacent word pairs (weighted lower),
+    so that "user interfaces" also matches "UI"."""
+    words = [word for word in normalize_query(text).split() if word not in _STOPWORDS]
+    acronyms = Counter()
+    for first, second in zip(words, words[1:]):
+        if first.isalpha() and second.isalpha():
+            acronyms[first[0] + second[0]] += ACRONYM_WEIGHT
+    return Counter(_stem(word) for word in words), acronyms
+
+
+def _document(request: str, title: str, subject: str) -> Counter:
+    counts = Counter()
+    for text in (request, title, subject):
+        words, acronyms = terms(text)
+        counts.update(words)
+        counts.update(acronyms)
+    return counts
+
+
+@dataclass
+class TopicMatch:
+    topic: Topic
+    request: str
+    score: float
+
+
+class TopicLibrary:
+    """Generated topics in SQLite, with an in-memory inverted index of their TF-IDF vectors.
+
+    Lookups only touch the posting lists of the query terms. Adding a topic updates the index
+    incrementally; the IDF weights are refreshed for all documents once the library has grown by
+    `REWEIGHT_GROWTH`, so the amortized cost of an insert stays constant.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_LIBRARY_PATH):
+        self.path = path or None
+        self._lock = threading.RLock()
+        self._documents: dict[int, tuple[str, Counter]] = {}
+        # Topic JSON is only kept in memory without a database file, otherwise it's read on a match.
+        self._topics: dict[int, str] = {}
+        self._document_frequency: Counter = Counter()
+        self._postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self._max_weight: dict[str, float] = defaultdict(float)
+        self._weighted_size = 0
+        self._last_id = 0
+        self._refreshed_at = 0.0
+        self._next_memory_id = 1
+        self._store = SQLiteStore(self.path, _SCHEMA) if self.path else None
+        if self.path:
+            self.refresh(force=True)
+        metrics.register_collector(lambda: [("learnie_topic_library_topics", {}, len(self))])
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _idf(self, term: str) -> float:
+        return math.log((1 + len(self._documents)) / (1 + self._document_frequency[term])) + 1
+
+    def _vector(self, counts: Counter) -> dict[str, float]:
+        weights = {term: (1 + math.log(count)) * self._idf(term) for term, count in counts.items() if count > 0}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        return {term: weight / norm for term, weight in weights.items()}
+
+    def _index(self, document_id: int, request: str, title: str, subject: str, post: bool = True) -> None:
+        counts = _document(request, title, subject)
+        self._documents[document_id] = (request, counts)
+        self._document_frequency.update(counts.keys())
+        if not post:
+            return
+        if len(self._documents) > self._weighted_size * (1 + REWEIGHT_GROWTH):
+            self._reweight()
+        else:
+            self._post(document_id, counts)
+
+    def _post(self, document_id: int, counts: Counter) -> None:
+        for term, weight in self._vector(counts).items():
+            self._postings[term][document_id] = weight
+            self._max_weight[term] = max(self._max_weight[term], weight)
+
+    def _reweight(self) -> None:
+        self._postings = defaultdict(dict)
+        self._max_weight = defaultdict(float)
+        for document_id, (_, counts) in self._documents.items():
+            self._post(document_id, counts)
+        self._weighted_size = len(self._documents)
+
+    def refresh(self, force: bool = False) -> None:
+        """Indexes the topics other processes added to the shared file since the last refresh."""
+        if not self.path or (not force and time.monotonic() - self._refreshed_at < REFRESH_INTERVAL_SECONDS):
+            return
+        with self._lock:
+            rows = self._store.connection().execute(
+                "SELECT id, request, json_extract(topic, '$.title'), json_extract(topic, '$.subject') FROM topics"
+                " WHERE id > ? ORDER BY id",
+                (self._last_id,),
+            ).fetchall()
+            for document_id, request, title, subject in rows:
+                self._index(document_id, request, title, subject, post=len(rows) == 1)
+                self._last_id = document_id
+            if len(rows) > 1:
+                self._reweight()
+            self._refreshed_at = time.monotonic()
+
+    def add(self, request: str, topic: Topic) -> None:
+        topic_json = topic.model_dump_json(exclude_none=True)
+        with self._lock:
+            if self.path:
+                self.refresh(force=True)
+                cursor = self._store.connection().execute(
+                    "INSERT INTO topics (request, topic, created_at) VALUES (?, ?, ?)", (request, topic_json, time.time())
+                )
+                document_id = self._last_id = cursor.lastrowid
+            else:
+                document_id = self._next_memory_id
+                self._next_memory_id += 1
+                self._topics[document_id] = topic_json
+            self._index(document_id, request, topic.title, topic.subject)
+
+    def search(self, request: str, limit: int = 1, min_score: float = 0.0) -> list[TopicMatch]:
+        """The stored topics most similar to the request, by cosine similarity of the TF-IDF vectors.
+
+        Query terms are scored from the rarest to the most common. Once the remaining terms can't lift
+        a document that wasn't seen yet to `min_score`, common terms only update the known candidates,
+        so a frequent word like "design" doesn't scan its whole posting list.
+        """
+        self.refresh()
+        with self._lock:
+            words, acronyms = terms(request)
+            # An acronym nobody used tells nothing about the request, unlike an unknown word.
+            words.update({term: count for term, count in acronyms.items() if term in self._postings})
+            query = sorted(self._vector(words).items(), key=lambda item: len(self._postings.get(item[0], ())))
+            remaining = sum(weight * self._max_weight.get(term, 0.0) for term, weight in query)
+            scores: dict[int, float] = defaultdict(float)
+            for term, weight in query:
+                postings = self._postings.get(term, {})
+                if remaining >= min_score or len(postings) < len(scores):
+                    for document_id, document_weight in postings.items():
+                        if remaining >= min_score or document_id in scores:
+                            scores[document_id] += weight * document_weight
+                else:
+                    for document_id in scores:
+                        scores[document_id] += weight * postings.get(document_id, 0.0)
+                remaining -= weight * self._max_weight.get(term, 0.0)
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [
+                TopicMatch(Topic.model_validate_json(self._topic_json(document_id)), self._documents[document_id][0], score)
+                for document_id, score in best
+                if score >= min_score
+            ]
+
+    def _topic_json(self, document_id: int) -> str:
+        if not self.path:
+            return self._topics[document_id]
+        return self._store.connection().execute("SELECT topic FROM topics WHERE id = ?", (document_id,)).fetchone()[0]
+
+    def best_match(self, request: str, min_score: float = 0.0) -> Optional[TopicMatch]:
+        matches = self.search(request, min_score=min_score)
+        return matches[0] if matches else None
+
+
+@functools.cache
+def get_topic_library() -> TopicLibrary:
+    """Returns the process-wide topic library stored at TOPIC_LIBRARY_PATH ("" keeps it in memory only)."""
+    return TopicLibrary(os.environ.get("TOPIC_LIBRARY_PATH", DEFAULT_LIBRARY_PATH))
+
+
+def reuse_threshold() -> float:
+    return float(os.environ.get("TOPIC_LIBRARY_REUSE_THRESHOLD", DEFAULT_REUSE_THRESHOLD))
+
+
+def seed_threshold() -> float:
+    return float(os.environ.get("TOPIC_LIBRARY_SEED_THRESHOLD", DEFAULT_SEED_THRESHOLD))
+
+
+def find_reusable_topic(request: str) -> tuple[Optional[Topic], Optional[Topic]]:
+    """Looks the request up in the library.
+
+    Returns:
+        (topic to reuse as is, topic to use as a seed for the generation); at most one of them is set
+    """
+    match = get_topic_library().best_match(request, min_score=min(reuse_threshold(), seed_threshold()))
+    if match and match.score >= reuse_threshold():
+        metrics.inc("learnie_topic_library_lookups_total", {"result": "reuse"})
+        return match.topic, None
+    if match and match.score >= seed_threshold():
+        metrics.inc("learnie_topic_library_lookups_total", {"result": "seed"})
+        return None, match.topic
+    metrics.inc("learnie_topic_library_lookups_total", {"result": "miss"})
+    return None, None
+
+
+def seeded_request(request: str, seed: Topic) -> str:
+    """Adds the outline of a similar existing topic to the request for the topic creator."""
+    outline = "\n".join(
+        f"- {section.title}: " + "; ".join(subtopic.title for subtopic in section.subtopics)
+        for section in seed.sections
+    )
+    return f"{request}\n\nA similar topic \"{seed.title}\" was structured like this, reuse what fits the request:\n{outline}"
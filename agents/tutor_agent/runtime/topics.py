@@ -0,0 +1,56 @@
+"""Programmatic topic creation."""
+
+from .generation_cache import cached_generation
+from .runner import run_agent_output
+from .topic_library import find_reusable_topic, get_topic_library, seeded_request
+from ..registry import get_agent
+from ..sub_agents.topic_creator_agent.types import Topic
+from ..tools.brave_search_tools import search_brave_images_batch
+
+
+def section_image_query(topic: Topic, section_title: str) -> str:
+    return f"{section_title} {topic.subject}"
+
+
+async def enrich_topic_images(topic: Topic, overwrite: bool = False) -> Topic:
+    """Fills `imageUrl` of every section without one using a single concurrent batch of image lookups.
+
+    With `overwrite` every section gets a searched image, e.g. when the model wasn't given the search
+    tool and any URL it wrote is made up.
+    """
+    sections = [section for section in topic.sections if overwrite or not section.imageUrl]
+    if sections:
+        images = await search_brave_images_batch([section_image_query(topic, section.title) for section in sections])
+        for section, image in zip(sections, images):
+            section.imageUrl = image["url"]
+    return topic
+
+
+async def create_topic(request: str, regenerate: bool = False, structured: bool = True) -> Topic:
+    """Creates a validated topic structure for the user's learning request.
+
+    A sufficiently similar topic from the topic library is returned without calling the model;
+    a less similar one is passed to the model as a seed.
+
+    Args:
+        request: The user's learning wish, e.g. "I want to learn how to design user interfaces"
+        regenerate: Bypass the generation cache and the topic library and create a fresh topic
+        structured: Generate the structure with `response_schema=Topic` and no tools, then add the
+            section images in a separate step. Otherwise `topic_creator_agent` searches the images itself.
+    """
+    agent = get_agent("topic_structure_agent" if structured else "topic_creator_agent")
+    prompt = request
+    if not regenerate:
+        reusable, seed = find_reusable_topic(request)
+        if reusable:
+            return reusable
+        if seed:
+            prompt = seeded_request(request, seed)
+
+    async def generate() -> Topic:
+        topic = await run_agent_output(agent, prompt, Topic)
+        topic = await enrich_topic_images(topic, overwrite=structured)
+        get_topic_library().add(request, topic)
+        return topic
+
+    return await cached_generation(agent, prompt, Topic, generate, regenerate=regenerate)
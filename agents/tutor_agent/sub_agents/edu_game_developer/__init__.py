@@ -1 +1,8 @@
-from .agent import edu_game_developer
\ No newline at end of file
+import importlib
+
+
+def __getattr__(name: str):
+    # The agent is only built when it's first used, see tutor_agent/registry.py.
+    if name == "edu_game_developer":
+        return getattr(importlib.import_module(".agent", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,27 @@
+import json
+import logging
+from typing import Optional
+
 from google.adk.agents import Agent
-from .game_ideas import game_ideas
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import BaseModel, ValidationError
+
+from .game_ideas import game_ideas, games
+from .render import render_game
+from ...runtime.parsing import AgentOutputError, parse_agent_output, repair_json
+from ...tools.image_cache import normalize_query
+from ...tools.session_materials import compact_history, get_material_digest
+
+logger = logging.getLogger(__name__)
+
+GAME_KEY_PREFIX = "game:"
+REGENERATE_WORDS = {"new", "another", "different", "regenerate"}
+
 
 def get_gameplay_ideas() -> list[str]:
-    """Returns a list of possible gameplay ideas. This can be taken as inspiration!
+    """Returns a list of available games with their ids. Pick the one that fits the material best!
 
     Returns:
         list of gameplay ideas
@@ -10,33 +29,86 @@ def get_gameplay_ideas() -> list[str]:
     return game_ideas
 
 
+def _parse_game(text: str) -> BaseModel:
+    data = json.loads(repair_json(text))
+    if not isinstance(data, dict):
+        raise AgentOutputError(f"Expected a game data object, got {type(data).__name__}", text)
+    game_id = data.get("game", "memory_tiles")
+    if not isinstance(game_id, str) or game_id not in games:
+        raise AgentOutputError(f"Unknown game {game_id!r}", text)
+    return parse_agent_output(text, games[game_id].schema, "edu_game_developer")
+
+
+def render_game_response(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """after_model_callback: turns the model's game data into the final HTML game and caches it per subtopic."""
+    if llm_response.partial or not llm_response.content or not llm_response.content.parts:
+        return None
+    if any(part.function_call for part in llm_response.content.parts):
+        return None
+    text = "".join(part.text or "" for part in llm_response.content.parts)
+    if not text.strip():
+        return None
+    try:
+        game = _parse_game(text)
+    except (ValueError, KeyError, ValidationError) as e:
+        logger.warning("Invalid game data: %s", e)
+        html = "Sorry, the game could not be built from the material. Please ask for a game again."
+    else:
+        html = render_game(game)
+        callback_context.state[GAME_KEY_PREFIX + normalize_query(game.subtopic)] = html
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text=html)]),
+        custom_metadata=llm_response.custom_metadata,
+    )
+
+
+def serve_cached_game(callback_context: CallbackContext) -> Optional[types.Content]:
+    """before_agent_callback: answers with the game already rendered for the requested subtopic."""
+    request = normalize_query("".join(
+        part.text or "" for part in (callback_context.user_content.parts if callback_context.user_content else [])
+    ))
+    # Whole words and titles only: "Renewable energy" doesn't ask for a new game, and the game of
+    # "Cubism" isn't served for "Synthetic Cubism".
+    if not request or REGENERATE_WORDS & set(request.split()):
+        return None
+    padded = f" {request} "
+    subtopics = [
+        key[len(GAME_KEY_PREFIX):] for key in callback_context.state.to_dict()
+        if key.startswith(GAME_KEY_PREFIX) and f" {key[len(GAME_KEY_PREFIX):]} " in padded
+    ]
+    if not subtopics:
+        return None
+    html = callback_context.state[GAME_KEY_PREFIX + max(subtopics, key=len)]
+    return types.Content(role="model", parts=[types.Part(text=html)])
+
+
 edu_game_developer = Agent(
     name="edu_game_developer",
     model="gemini-2.5-flash-preview-04-17",
-    description="Writes indy games in HTML which help to learn and memorize the material.",
+    description="Creates HTML games which help to learn and memorize the material.",
     instruction=(
         """
-        YOU ARE A WORLD-CLASS PROFESSIONAL GAME DEVELOPER SPECIALIZED IN CREATING EDUCATIONAL INDY GAMES DESIGNED TO HELP USERS LEARN AND MEMORIZE MATERIAL EFFECTIVELY. YOUR TASK IS TO DEVELOP INTERACTIVE HTML-BASED GAMES WITH A SCORING SYSTEM FROM 0 TO 100 THAT INDICATES THE USER’S LEVEL OF MASTERY OF THE MATERIAL.
+        YOU ARE A WORLD-CLASS PROFESSIONAL GAME DESIGNER SPECIALIZED IN EDUCATIONAL GAMES DESIGNED TO HELP USERS LEARN AND MEMORIZE MATERIAL EFFECTIVELY. THE GAMES ARE PREBUILT HTML TEMPLATES WITH A SCORING SYSTEM FROM 0 TO 100; YOUR TASK IS TO FILL THEM WITH GAME DATA BASED ON THE MATERIAL.
 
         <instructions>
-        - READ THE USER'S INPUT CAREFULLY, which will include the material to be learned.
-        - USE THE TOOL `get_gameplay_ideas` TO GENERATE INNOVATIVE GAMEPLAY CONCEPTS BASED ON THE USER'S INPUT AND EDUCATIONAL MATERIAL.
-        - COMBINE THE GAME DESCRIPTION, GAMEPLAY IDEAS, AND MATERIAL TO CREATE A UNIQUE, ENGAGING GAME.
-        - STRUCTURE THE GAME WITH A START SCREEN THAT INCLUDES:
-          - A SHORT DESCRIPTION OF THE GAME.
-          - CLEAR, SHORT RULES OF THE GAME.
-          - A START BUTTON TO INITIATE GAMEPLAY.
-          - A GAME OBJECTIVE: "REACH SCORE 100."
-        - ENSURE ALL OUTPUT IS RETURNED AS A SINGLE, WELL-STRUCTURED HTML FILE.
-        - THE GAME SIZE SHOULD BE 700x800 px
-        - DO NOT INCLUDE ANY EXTRANEOUS TEXT OR EXPLANATIONS OUTSIDE THE HTML CODE.
+        - READ THE USER'S INPUT CAREFULLY, which will include the subtopic to be learned.
+        - USE THE TOOL `get_material_digest` WITH THE SUBTOPIC TITLE TO GET THE KEY POINTS OF THE MATERIAL TO BE LEARNED.
+        - USE THE TOOL `get_gameplay_ideas` TO GET THE AVAILABLE GAMES AND PICK THE ONE THAT FITS THE MATERIAL.
+        - EXTRACT 3 TO 8 TERM / DEFINITION PAIRS THAT COVER THE MOST IMPORTANT FACTS OF THE MATERIAL. TERMS UP TO 40 CHARACTERS, DEFINITIONS UP TO 90 CHARACTERS.
+        - WRITE A SHORT GAME TITLE, A ONE-SENTENCE DESCRIPTION AND 2 TO 4 SHORT RULES FOR THE START SCREEN.
+        - RETURN ONLY THE GAME DATA AS A JSON OBJECT (NEVER WRAP IN ```json ```) IN THIS FORMAT:
+          {"game": "memory_tiles", "subtopic": "...", "title": "...", "description": "...", "rules": ["..."], "pairs": [{"term": "...", "definition": "..."}], "previewSeconds": 4, "roundSeconds": 90, "mismatchPenalty": 2}
+        - MAKE `previewSeconds` AND `roundSeconds` FIT THE NUMBER AND LENGTH OF THE PAIRS.
         </instructions>
 
         <what not to do>
-        - NEVER RETURN ANY CONTENT OUTSIDE THE HTML CODE.
-        - NEVER USE MARKDOWN CODE QUOTES OR ANY FORMATTING OTHER THAN HTML.
+        - NEVER WRITE HTML, CSS OR JAVASCRIPT, THE GAME TEMPLATE ALREADY EXISTS.
+        - NEVER RETURN ANY CONTENT OUTSIDE THE JSON OBJECT.
         </what not to do>
         """
     ),
-    tools=[get_gameplay_ideas],
+    tools=[get_gameplay_ideas, get_material_digest],
+    before_agent_callback=serve_cached_game,
+    before_model_callback=compact_history,
+    after_model_callback=render_game_response,
 )
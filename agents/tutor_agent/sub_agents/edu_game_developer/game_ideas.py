@@ -1,30 +1,39 @@
-game_ideas = [
-    """
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+
+from .types import MemoryTilesGame
+
+
+@dataclass(frozen=True)
+class GameIdea:
+    """A gameplay idea backed by a prebuilt HTML template filled with `schema` data."""
+    id: str
+    description: str
+    template: str
+    schema: type[BaseModel]
+
+
+games = {
+    "memory_tiles": GameIdea(
+        id="memory_tiles",
+        template="memory_tiles.html",
+        schema=MemoryTilesGame,
+        description="""
     ## Memory Tiles Arcade
 
     Description:
     Memory Tiles Arcade is a fast-paced memory game emphasizing short-term recall. Tiles quickly appear and disappear, challenging players to remember pairs or concept matches based on the learning material.
-    
+
     Gameplay & Rules:
-	- Initially, tiles are briefly displayed face-up, each labeled with a concept, term, image, or definition.
-	- Tiles flip face-down, and the player must rapidly uncover matching pairs (e.g., a concept and its definition, term and its associated image, mathematical equation and its solution, historical date and event).
-	- Each round is timed, and speed and accuracy determine the player’s score.
+    - Initially, tiles are briefly displayed face-up, each labeled with a concept, term, image, or definition.
+    - Tiles flip face-down, and the player must rapidly uncover matching pairs (e.g., a concept and its definition, term and its associated image, mathematical equation and its solution, historical date and event).
+    - Each round is timed, and speed and accuracy determine the player’s score.
     """,
+    ),
+
+    # Match Attack (Matching Game): terms fall from the top of the screen and the player catches them into
+    # the right category bucket. Needs a template before it can be enabled.
+}
 
-    # """
-    # ## Match Attack (Matching Game)
-    #
-    # Description:
-    # Match Attack is an arcade-inspired, falling-items matching game. It challenges players to quickly categorize terms or concepts learned from the reading material, reinforcing active recall and fast recognition skills.
-    #
-    # Gameplay & Rules:
-    # - Terms (words or short phrases from educational content) fall from the top of the screen at increasing speeds.
-    # - At the bottom, there are labeled buckets/categories representing different groups learned in the reading material (e.g., historical periods, chemical elements, word categories, math formulas, etc.).
-    # - Players control a sliding catcher to quickly catch each falling term and release it into the correct category bucket.
-    # - Missing an item or placing it in an incorrect bucket results in lost points or missed combo opportunities.
-    #
-    # How Educational Material Is Applied:
-    # - Terms and categories directly reflect key points from recently read texts.
-    # - This encourages fast recognition and immediate categorization, reinforcing memorization through repetition and rapid categorization.
-    # """
-]
\ No newline at end of file
+game_ideas = [f"game id: {idea.id}\n{idea.description}" for idea in games.values()]
@@ -0,0 +1,23 @@
+import functools
+import json
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from .game_ideas import games
+
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+DATA_PLACEHOLDER = "/*GAME_DATA*/null"
+
+
+@functools.cache
+def load_template(name: str) -> str:
+    return (TEMPLATES_DIR / name).read_text(encoding="utf-8")
+
+
+def render_game(game: BaseModel) -> str:
+    """Injects validated game data into the game's HTML template."""
+    template = load_template(games[game.game].template)
+    # "</" would close the <script> element early.
+    data = json.dumps(game.model_dump(), ensure_ascii=False).replace("</", "<\\/")
+    return template.replace(DATA_PLACEHOLDER, data, 1)
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal
+
+class TermPair(BaseModel):
+    """A concept and its matching definition."""
+    term: str = Field(description="Short concept, term, date or name (up to 40 characters).")
+    definition: str = Field(description="Matching definition or fact (up to 90 characters).")
+
+class MemoryTilesGame(BaseModel):
+    """Game data for the Memory Tiles Arcade template."""
+    game: Literal["memory_tiles"] = Field(default="memory_tiles", description="Game template id.")
+    subtopic: str = Field(description="The subtopic title the game is built for.")
+    title: str = Field(description="Title shown on the start screen.")
+    description: str = Field(description="Short description of the game shown on the start screen.")
+    rules: List[str] = Field(description="2 to 4 short rules shown on the start screen.")
+    pairs: List[TermPair] = Field(min_length=3, max_length=8, description="3 to 8 term/definition pairs.")
+    previewSeconds: int = Field(default=4, ge=1, le=10, description="Seconds the tiles are shown face-up.")
+    roundSeconds: int = Field(default=90, ge=20, le=300, description="Duration of the round in seconds.")
+    mismatchPenalty: int = Field(default=2, ge=0, le=20, description="Points lost for a wrong pair.")
@@ -1,6 +1,7 @@
 from google.adk.agents import Agent
 from .prompt import prompt
-from ...tools.brave_search_tools import search_brave_images
+from ...tools.brave_search_tools import search_brave_images_batch
+from ...tools.session_materials import MATERIAL_OUTPUT_KEY, compact_history, remember_materials
 
 
 edu_materials_agent = Agent(
@@ -8,5 +9,8 @@ edu_materials_agent = Agent(
     model="gemini-2.5-flash-preview-04-17",
     description="Provides educational materials for subtopic based on the user request, subtopic title and summary, section title and topic title.",
     instruction=prompt,
-    tools=[search_brave_images]
+    tools=[search_brave_images_batch],
+    output_key=MATERIAL_OUTPUT_KEY,
+    before_model_callback=compact_history,
+    after_agent_callback=remember_materials,
 )
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class MaterialBlock(BaseModel):
+    """A single illustrated block of a subtopic article."""
+    text: str = Field(description="Markdown text of the block.")
+    imageUrl: Optional[str] = Field(default=None, description="URL of the illustration for this block.")
+    imageDescription: Optional[str] = Field(default=None, description="How the illustration relates to the block.")
+
+class Material(BaseModel):
+    """Educational material generated for a subtopic."""
+    title: str = Field(description="The title of the subtopic.")
+    summary: str = Field(description="Short summary of the material.")
+    material: List[MaterialBlock] = Field(description="List of 3 to 7 article blocks.")
+    references: List[str] = Field(default_factory=list, description="Reference links used for the material.")
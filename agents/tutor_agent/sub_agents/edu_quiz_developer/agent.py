@@ -1,14 +1,48 @@
 from google.adk.agents import Agent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.genai.types import GenerateContentConfig
+
+from .types import Quiz
+from ...tools.session_materials import add_material_context, compact_history
+
+
+def _before_model(callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+    compact_history(callback_context, llm_request)
+    return add_material_context(callback_context, llm_request)
 
 
 edu_quiz_developer = Agent(
     name="edu_quiz_developer",
     model="gemini-2.5-flash-preview-04-17",
-    description="Creates quizes for educational materials to help users memorize the material.",
+    description="Creates multiple choice quizes for educational materials to help users memorize the material.",
     instruction=(
         """
         YOU ARE A WORLD-CLASS PROFESSIONAL QUIZ DEVELOPER SPECIALIZED IN CREATING EDUCATIONAL QUZES WITH QUESTIONS AND ANSWERS.
-        YOU SHOULD RETURN 
+
+        <instructions>
+        - READ THE USER'S INPUT CAREFULLY, which will include the subtopic and may include its material.
+        - BASE THE QUIZ ONLY ON THE MATERIAL FROM THE REQUEST OR FROM THE INSTRUCTIONS. IF THERE IS NO MATERIAL, CREATE BASIC QUESTIONS ABOUT THE SUBTOPIC TITLE ONLY.
+        - CREATE 3 TO 5 CLEAR, UNAMBIGUOUS QUESTIONS THAT COVER DIFFERENT ASPECTS OF THE MATERIAL.
+        - EVERY QUESTION HAS 4 OPTIONS AND EXACTLY ONE CORRECT OPTION, `correctOptionIndex` IS ITS 0-BASED INDEX.
+        - VARY THE POSITION OF THE CORRECT OPTION BETWEEN QUESTIONS.
+        - ADD A CONCISE EXPLANATION (UP TO 144 CHARACTERS) WHY THE CORRECT OPTION IS RIGHT.
+        - ADD A SHORT TITLE AND A SUMMARY OF WHAT THE QUIZ TESTS (UP TO 280 CHARACTERS).
+        </instructions>
+
+        <what not to do>
+        - NEVER USE INFORMATION THAT IS NOT IN THE MATERIAL.
+        - NEVER CREATE TRICK QUESTIONS OR OPTIONS LIKE "ALL OF THE ABOVE".
+        </what not to do>
+
+        YOU SHOULD RETURN ONLY THE QUIZ AS A JSON OBJECT.
         """
     ),
+    output_schema=Quiz,
+    disallow_transfer_to_parent=True,
+    disallow_transfer_to_peers=True,
+    generate_content_config=GenerateContentConfig(
+        temperature=0.4
+    ),
+    before_model_callback=_before_model,
 )
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+
+class Question(BaseModel):
+    """A multiple choice question, the `ChoiceQuizQuestion` of the web app."""
+    question: str = Field(description="A clear, unambiguous question about the material.")
+    options: List[str] = Field(min_length=2, max_length=6, description="Answer options, usually 4.")
+    correctOptionIndex: int = Field(ge=0, description="Index of the correct option in `options`.")
+    explanation: Optional[str] = Field(default=None, description="Why the answer is correct, up to 144 characters.")
+
+    @model_validator(mode="after")
+    def check_correct_option(self) -> "Question":
+        if self.correctOptionIndex >= len(self.options):
+            raise ValueError(f"correctOptionIndex {self.correctOptionIndex} is out of range of {len(self.options)} options")
+        return self
+
+class Quiz(BaseModel):
+    """A multiple choice quiz for a subtopic, the `ChoiceQuizBlock` of the web app."""
+    type: Literal["QUIZ_CHOICE"] = Field(default="QUIZ_CHOICE", description="Learning block type, always QUIZ_CHOICE.")
+    title: str = Field(description="The title of the quiz.")
+    summary: Optional[str] = Field(default=None, description="What this quiz tests, up to 280 characters.")
+    questions: List[Question] = Field(min_length=1, max_length=10, description="List of 3 to 5 questions.")
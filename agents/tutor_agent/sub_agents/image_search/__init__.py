@@ -1 +1,8 @@
-from .agent import image_search_agent
+import importlib
+
+
+def __getattr__(name: str):
+    # The agent is only built when it's first used.
+    if name == "image_search_agent":
+        return getattr(importlib.import_module(".agent", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,7 @@
 from google.adk.agents import Agent
 import contextlib
-from dotenv import load_dotenv
 from ...tools.brave_search_tools import search_brave_images
 
-# Load environment variables from .env file
-load_dotenv()
-
 
 async def create_agent_async():
   """Creates an image search agent with Brave Search API tool."""
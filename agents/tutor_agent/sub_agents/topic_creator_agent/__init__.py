@@ -1 +1,8 @@
-from .agent import topic_creator_agent
\ No newline at end of file
+import importlib
+
+
+def __getattr__(name: str):
+    # Both agents are only built when first used; the runtime imports `.types` without them.
+    if name in ("topic_creator_agent", "topic_structure_agent"):
+        return getattr(importlib.import_module(".agent", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
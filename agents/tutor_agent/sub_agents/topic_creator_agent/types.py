@@ -13,7 +13,7 @@ class Section(BaseModel):
     """A section containing multiple subtopics."""
     title: str = Field(description="The title of the section.")
     subtopics: List[Subtopic] = Field(description="List of subtopics in this section.")
-    imageUrl: str = Field(description="URL of the image that describes this section.")
+    imageUrl: Optional[str] = Field(default=None, description="URL of the image that describes this section.")
 
 class Topic(BaseModel):
     """A topic containing multiple sections on a given subject."""
@@ -1,20 +1,71 @@
-import json
+import asyncio
+import logging
 import os
-import requests
-from dotenv import load_dotenv
+import random
+import threading
+import weakref
 
-# Load environment variables from .env file
-load_dotenv()
+import httpx
 
+from .image_cache import get_image_cache
+from .image_proxy import IMAGE_CANDIDATES, image_proxy_base_url, proxy_image
+from ..runtime.scheduler import get_scheduler
 
-def search_brave_images(query: str):
-  """Search for images using Brave Search API.
+logger = logging.getLogger(__name__)
+
+BRAVE_IMAGES_URL = "https://api.search.brave.com/res/v1/images/search"
+
+# One pooled keep-alive client per event loop; a client can't be shared across loops.
+REQUEST_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("BRAVE_MAX_CONCURRENCY", "8"))
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[httpx.AsyncClient, asyncio.Semaphore]]" = (
+  weakref.WeakKeyDictionary()
+)
+_sync_loop: asyncio.AbstractEventLoop | None = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_client() -> tuple[httpx.AsyncClient, asyncio.Semaphore]:
+  loop = asyncio.get_running_loop()
+  if loop not in _clients:
+    client = httpx.AsyncClient(timeout=REQUEST_TIMEOUT, limits=POOL_LIMITS)
+    _clients[loop] = (client, asyncio.Semaphore(MAX_CONCURRENT_REQUESTS))
+  return _clients[loop]
+
+
+async def close_brave_client() -> None:
+  """Closes the pooled client bound to the running event loop."""
+  entry = _clients.pop(asyncio.get_running_loop(), None)
+  if entry:
+    await entry[0].aclose()
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+  retry_after = response.headers.get("Retry-After")
+  return float(retry_after) if retry_after and retry_after.isdigit() else None
+
+
+def _retry_delay(attempt: int) -> float:
+  return RETRY_BACKOFF_SECONDS * (2 ** attempt) + random.uniform(0, RETRY_BACKOFF_SECONDS)
+
+
+async def fetch_brave_images(query: str, count: int = 1) -> list[dict]:
+  """Requests raw image results from Brave Search API.
+
+  Every attempt waits for a token of the "brave" upstream scheduler, which also backs off on 429.
+  5xx responses and transport errors are retried with exponential backoff.
 
   Args:
       query: The search query string
+      count: Number of results to request
 
   Returns:
-      dict with image_url field
+      list of Brave image result objects
   """
   api_key = os.environ.get("BRAVE_API_KEY")
   if not api_key:
@@ -24,30 +75,94 @@ def search_brave_images(query: str):
     "Accept": "application/json",
     "X-Subscription-Token": api_key
   }
+  params = {"q": query, "count": count}
+
+  client, semaphore = _get_client()
+  scheduler = get_scheduler("brave")
+  for attempt in range(MAX_RETRIES + 1):
+    response = None
+    await scheduler.acquire()
+    try:
+      async with semaphore:
+        response = await client.get(os.environ.get("BRAVE_IMAGES_URL", BRAVE_IMAGES_URL), headers=headers, params=params)
+      if response.status_code not in RETRY_STATUSES:
+        response.raise_for_status()
+        scheduler.succeeded()
+        return response.json().get("results") or []
+    except httpx.TransportError:
+      if attempt == MAX_RETRIES:
+        raise
+    if response is not None and response.status_code == 429:
+      # The scheduler pauses every caller, the next acquire() waits for it.
+      scheduler.throttled(_retry_after(response))
+    elif attempt < MAX_RETRIES:
+      await asyncio.sleep(_retry_delay(attempt))
+    if attempt == MAX_RETRIES:
+      response.raise_for_status()
+  return []
 
-  params = {
-    "q": query,
-    # Only get one image as required
-    "count": 1
-  }
 
-  url = "https://api.search.brave.com/res/v1/images/search"
+async def search_brave_images(query: str):
+  """Search for images using Brave Search API.
 
+  With the image proxy enabled the URL is the local thumbnail of the first live result.
+
+  Args:
+      query: The search query string
+
+  Returns:
+      dict with url field (empty when nothing was found)
+  """
+  cache = get_image_cache()
+  # Proxied URLs depend on the proxy's base URL, raw ones don't.
+  scope = image_proxy_base_url()
+  cached_url = cache.get(query, scope)
+  if cached_url is not None:
+    return {"url": cached_url}
+
+  proxied = bool(scope)
   try:
-    response = requests.get(url, headers=headers, params=params)
-    response.raise_for_status()  # Raise an exception for HTTP errors
-    data = response.json()
-
-    if not data.get("results") or len(data["results"]) == 0:
-      return {
-        "image_url": "",
-      }
-
-    result = data["results"][0]
-    # Parse all fields according to Brave API documentation
-    return {
-      "url": result.get("properties", {}).get("url", ""),
-    }
+    results = await fetch_brave_images(query, count=IMAGE_CANDIDATES if proxied else 1)
   except Exception as e:
-    print(f"Error request image for {query}: {e}")
+    logger.warning("Error request image for %s: %s", query, e)
     return None
+
+  urls = [url for url in (result.get("properties", {}).get("url") for result in results) if url]
+  if proxied:
+    url = await proxy_image(urls)
+  else:
+    url = urls[0] if urls else ""
+  cache.set(query, url, scope)
+  return {"url": url}
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+  global _sync_loop
+  with _sync_loop_lock:
+    if _sync_loop is None:
+      _sync_loop = asyncio.new_event_loop()
+      threading.Thread(target=_sync_loop.run_forever, name="brave-search", daemon=True).start()
+  return _sync_loop
+
+
+def search_brave_images_sync(query: str):
+  """Blocking wrapper around `search_brave_images` for non-async callers.
+
+  Runs on a dedicated background loop so the pooled client is reused between calls.
+  """
+  return asyncio.run_coroutine_threadsafe(search_brave_images(query), _get_sync_loop()).result()
+
+
+async def search_brave_images_batch(queries: list[str]):
+  """Search images for several queries at once using Brave Search API.
+
+  Args:
+      queries: The search query strings
+
+  Returns:
+      list of dicts with query and url fields, in the same order as queries
+  """
+  unique_queries = list(dict.fromkeys(queries))
+  results = await asyncio.gather(*(search_brave_images(query) for query in unique_queries))
+  urls = {query: (result or {}).get("url", "") for query, result in zip(unique_queries, results)}
+  return [{"query": query, "url": urls[query]} for query in queries]
@@ -0,0 +1,137 @@
+import functools
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+
+from ..runtime.sqlite_store import SQLiteStore, default_path
+
+DEFAULT_CACHE_PATH = default_path("image_cache.sqlite3")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_NEGATIVE_TTL_SECONDS = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+  key TEXT PRIMARY KEY,
+  url TEXT NOT NULL,
+  expires_at REAL NOT NULL,
+  accessed_at REAL NOT NULL
+)
+"""
+
+
+def normalize_query(query: str) -> str:
+  """Normalizes a search query so near-identical phrasings share a cache key."""
+  query = unicodedata.normalize("NFKC", query).casefold()
+  query = re.sub(r"[^\w\s]", " ", query)
+  return " ".join(query.split())
+
+
+class ImageCache:
+  """Two-tier query -> image URL cache: in-process LRU in front of a shared SQLite file.
+
+  Empty results are cached as well (with a shorter TTL) so repeated misses don't hit the API.
+  The SQLite file runs in WAL mode, so several worker processes can share it.
+  """
+
+  def __init__(
+      self,
+      path: str | None = DEFAULT_CACHE_PATH,
+      ttl_seconds: float = DEFAULT_TTL_SECONDS,
+      negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+      max_memory_entries: int = 2048,
+      max_disk_entries: int = 200_000,
+  ):
+    self.path = path
+    self.ttl_seconds = ttl_seconds
+    self.negative_ttl_seconds = negative_ttl_seconds
+    self.max_memory_entries = max_memory_entries
+    self.max_disk_entries = max_disk_entries
+    self.stats = Counter()
+    self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+    self._lock = threading.Lock()
+    self._store = SQLiteStore(path, _SCHEMA) if path else None
+
+  def _remember(self, key: str, url: str, expires_at: float) -> None:
+    with self._lock:
+      self._memory[key] = (url, expires_at)
+      self._memory.move_to_end(key)
+      while len(self._memory) > self.max_memory_entries:
+        self._memory.popitem(last=False)
+
+  @staticmethod
+  def _key(query: str, scope: str) -> str:
+    # Normalized queries have no tabs, so scoped keys can't collide with unscoped ones.
+    key = normalize_query(query)
+    return f"{key}\t{scope}" if scope else key
+
+  def get(self, query: str, scope: str = "") -> str | None:
+    """Returns the cached URL ("" for a cached empty result) or None on a miss.
+
+    `scope` separates results of the same query that aren't interchangeable, e.g. proxied URLs.
+    """
+    key = self._key(query, scope)
+    now = time.time()
+    with self._lock:
+      entry = self._memory.get(key)
+      if entry and entry[1] > now:
+        self._memory.move_to_end(key)
+        self.stats["memory_hits"] += 1
+        self.stats["negative_hits" if not entry[0] else "positive_hits"] += 1
+        return entry[0]
+      if entry:
+        del self._memory[key]
+
+    if self.path:
+      connection = self._store.connection()
+      row = connection.execute(
+        "SELECT url, expires_at FROM images WHERE key = ? AND expires_at > ?", (key, now)
+      ).fetchone()
+      if row:
+        connection.execute("UPDATE images SET accessed_at = ? WHERE key = ?", (now, key))
+        self._remember(key, row[0], row[1])
+        self.stats["disk_hits"] += 1
+        self.stats["negative_hits" if not row[0] else "positive_hits"] += 1
+        return row[0]
+
+    self.stats["misses"] += 1
+    return None
+
+  def set(self, query: str, url: str, scope: str = "") -> None:
+    """Stores a lookup result; an empty url records a negative result."""
+    key = self._key(query, scope)
+    now = time.time()
+    expires_at = now + (self.ttl_seconds if url else self.negative_ttl_seconds)
+    self._remember(key, url, expires_at)
+    self.stats["writes"] += 1
+    if self.path:
+      connection = self._store.connection()
+      connection.execute(
+        "INSERT OR REPLACE INTO images (key, url, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+        (key, url, expires_at, now),
+      )
+      if self.stats["writes"] % 1000 == 0:
+        self.evict()
+
+  def evict(self) -> None:
+    """Drops expired rows and trims the disk tier to the least recently used `max_disk_entries`."""
+    if not self.path:
+      return
+    connection = self._store.connection()
+    connection.execute("DELETE FROM images WHERE expires_at <= ?", (time.time(),))
+    connection.execute(
+      "DELETE FROM images WHERE key IN (SELECT key FROM images ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+      (self.max_disk_entries,),
+    )
+
+
+@functools.cache
+def get_image_cache() -> ImageCache:
+  """Returns the process-wide image cache configured via IMAGE_CACHE_* environment variables."""
+  return ImageCache(
+    path=os.environ.get("IMAGE_CACHE_PATH", DEFAULT_CACHE_PATH) or None,
+    ttl_seconds=float(os.environ.get("IMAGE_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+    negative_ttl_seconds=float(os.environ.get("IMAGE_CACHE_NEGATIVE_TTL_SECONDS", DEFAULT_NEGATIVE_TTL_SECONDS)),
+  )
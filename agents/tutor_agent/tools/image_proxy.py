@@ -0,0 +1,250 @@
+"""Local proxy for the images found by Brave: liveness checks, fallback results and a thumbnail cache.
+
+Enabled by setting IMAGE_PROXY_BASE_URL to the public URL of the `/images` route. Image search then
+checks the candidate URLs concurrently, downloads the first live one, stores it resized in a
+content-addressed directory and returns the local URL instead of hot-linking the remote image.
+Resizing needs Pillow; without it the original image is stored as is. Only public addresses are
+fetched: every hop, redirects included, is resolved and refused if it points to a loopback, private,
+link-local or otherwise non-global address.
+"""
+
+import asyncio
+import functools
+import hashlib
+import io
+import ipaddress
+import logging
+import os
+import re
+import socket
+import weakref
+from typing import Optional
+
+import httpx
+
+from ..runtime.metrics import metrics
+from ..runtime.single_flight import SingleFlight
+
+try:
+  from PIL import Image
+except ImportError:  # Pillow is optional
+  Image = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THUMBNAIL_DIR = os.path.join(os.path.expanduser("~"), ".cache", "learnie", "thumbnails")
+DEFAULT_THUMBNAIL_SIZE = 800
+# Brave results checked per query; the first live one is used.
+IMAGE_CANDIDATES = int(os.environ.get("IMAGE_PROXY_CANDIDATES", "5"))
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+JPEG_QUALITY = 82
+
+REQUEST_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+LIVENESS_TIMEOUT = httpx.Timeout(3.0)
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+REQUEST_HEADERS = {"User-Agent": "LearnieImageProxy/1.0", "Accept": "image/*"}
+MAX_REDIRECTS = 5
+
+# Raster formats only: an SVG served from our origin could run scripts.
+_EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/gif": "gif", "image/webp": "webp"}
+_ASSET_NAME = re.compile(r"^[0-9a-f]{64}\.(?:jpg|png|gif|webp)$")
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+thumbnail_flights = SingleFlight("thumbnail")
+
+metrics.describe("learnie_image_proxy_total", "counter", "Proxied image lookups by outcome: first, fallback or unavailable.")
+metrics.describe("learnie_image_proxy_dead_urls_total", "counter", "Image URLs that failed the liveness check.")
+
+
+def image_proxy_base_url() -> str:
+  return os.environ.get("IMAGE_PROXY_BASE_URL", "").rstrip("/")
+
+
+class BlockedAddressError(httpx.RequestError):
+  """The image URL doesn't point to a public host."""
+
+
+def _is_public(address: str) -> bool:
+  ip = ipaddress.ip_address(address.split("%")[0])
+  if ip.version == 6 and ip.ipv4_mapped:
+    ip = ip.ipv4_mapped
+  return ip.is_global
+
+
+async def _check_public_host(request: httpx.Request) -> None:
+  """Request hook, run for every hop of a redirect chain: refuses hosts resolving to non-global addresses."""
+  url = request.url
+  if url.scheme not in ("http", "https") or not url.host:
+    raise BlockedAddressError(f"Refusing to fetch {url}", request=request)
+  port = url.port or (443 if url.scheme == "https" else 80)
+  try:
+    addresses = await asyncio.get_running_loop().getaddrinfo(url.host, port, type=socket.SOCK_STREAM)
+  except socket.gaierror as e:
+    raise httpx.ConnectError(f"Can't resolve {url.host}: {e}", request=request) from e
+  if not addresses or not all(_is_public(sockaddr[0]) for *_, sockaddr in addresses):
+    raise BlockedAddressError(f"Refusing to fetch {url}: {url.host} is not a public address", request=request)
+
+
+def _get_client() -> httpx.AsyncClient:
+  loop = asyncio.get_running_loop()
+  if loop not in _clients:
+    _clients[loop] = httpx.AsyncClient(
+      timeout=REQUEST_TIMEOUT, limits=POOL_LIMITS, headers=REQUEST_HEADERS, follow_redirects=True,
+      max_redirects=MAX_REDIRECTS, event_hooks={"request": [_check_public_host]},
+    )
+  return _clients[loop]
+
+
+async def close_image_client() -> None:
+  """Closes the pooled client bound to the running event loop."""
+  client = _clients.pop(asyncio.get_running_loop(), None)
+  if client:
+    await client.aclose()
+
+
+def _content_type(response: httpx.Response) -> str:
+  return response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+
+
+def make_thumbnail(data: bytes, content_type: str, max_size: int) -> Optional[tuple[bytes, str]]:
+  """Resizes the image to fit `max_size` pixels, returning (bytes, extension), or None if it isn't a usable image."""
+  if Image is None:
+    extension = _EXTENSIONS.get(content_type)
+    return (data, extension) if extension else None
+  try:
+    with Image.open(io.BytesIO(data)) as image:
+      image.thumbnail((max_size, max_size))
+      output = io.BytesIO()
+      if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image.convert("RGBA").save(output, "PNG", optimize=True)
+        return output.getvalue(), "png"
+      image.convert("RGB").save(output, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+      return output.getvalue(), "jpg"
+  except (OSError, ValueError, Image.DecompressionBombError):
+    return None
+
+
+class ThumbnailStore:
+  """Thumbnails on disk named by the SHA-256 of their content, with an index of source URL -> file name.
+
+  Files are written atomically, so several worker processes can share the directory.
+  """
+
+  def __init__(self, directory: str = DEFAULT_THUMBNAIL_DIR, max_size: int = DEFAULT_THUMBNAIL_SIZE):
+    self.directory = directory
+    self.max_size = max_size
+    os.makedirs(os.path.join(directory, "sources"), exist_ok=True)
+
+  def path(self, name: str) -> Optional[str]:
+    """Path of a stored thumbnail, None for an unknown or malformed name."""
+    if not _ASSET_NAME.match(name):
+      return None
+    path = os.path.join(self.directory, name)
+    return path if os.path.exists(path) else None
+
+  def _source_path(self, url: str) -> str:
+    return os.path.join(self.directory, "sources", hashlib.sha256(url.encode()).hexdigest())
+
+  def lookup(self, url: str) -> Optional[str]:
+    """Name of the thumbnail made from the source URL, if it's stored."""
+    try:
+      with open(self._source_path(url)) as source:
+        name = source.read().strip()
+    except FileNotFoundError:
+      return None
+    return name if self.path(name) else None
+
+  def _write(self, path: str, data: bytes) -> None:
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as output:
+      output.write(data)
+    os.replace(temporary, path)
+
+  def put(self, url: str, data: bytes, content_type: str) -> Optional[str]:
+    """Stores the thumbnail of a downloaded image and returns its name, None if it isn't a usable image."""
+    thumbnail = make_thumbnail(data, content_type, self.max_size)
+    if thumbnail is None:
+      return None
+    content, extension = thumbnail
+    name = f"{hashlib.sha256(content).hexdigest()}.{extension}"
+    if not self.path(name):
+      self._write(os.path.join(self.directory, name), content)
+    self._write(self._source_path(url), name.encode())
+    return name
+
+
+@functools.cache
+def get_thumbnail_store() -> ThumbnailStore:
+  """Returns the process-wide thumbnail store configured via IMAGE_THUMBNAIL_* environment variables."""
+  return ThumbnailStore(
+    directory=os.environ.get("IMAGE_THUMBNAIL_DIR", DEFAULT_THUMBNAIL_DIR),
+    max_size=int(os.environ.get("IMAGE_THUMBNAIL_SIZE", DEFAULT_THUMBNAIL_SIZE)),
+  )
+
+
+async def is_alive(url: str) -> bool:
+  """Whether the URL answers with an image, checked with HEAD (or a GET without reading the body)."""
+  client = _get_client()
+  try:
+    response = await client.head(url, timeout=LIVENESS_TIMEOUT)
+    if response.status_code in (403, 405, 501):
+      # Some hosts refuse HEAD requests.
+      async with client.stream("GET", url, timeout=LIVENESS_TIMEOUT) as response:
+        pass
+  except httpx.HTTPError:
+    alive = False
+  else:
+    content_type = _content_type(response)
+    alive = response.status_code < 400 and (not content_type or content_type.startswith("image/"))
+  if not alive:
+    metrics.inc("learnie_image_proxy_dead_urls_total", {})
+  return alive
+
+
+async def _download(url: str) -> Optional[str]:
+  store = get_thumbnail_store()
+  try:
+    async with _get_client().stream("GET", url) as response:
+      response.raise_for_status()
+      content_type = _content_type(response)
+      length = response.headers.get("Content-Length", "")
+      if length.isdigit() and int(length) > MAX_IMAGE_BYTES:
+        logger.warning("Image %s is larger than %d bytes", url, MAX_IMAGE_BYTES)
+        return None
+      data = bytearray()
+      async for chunk in response.aiter_bytes():
+        data += chunk
+        if len(data) > MAX_IMAGE_BYTES:
+          logger.warning("Image %s is larger than %d bytes", url, MAX_IMAGE_BYTES)
+          return None
+  except httpx.HTTPError as e:
+    logger.warning("Error downloading image %s: %s", url, e)
+    return None
+  return await asyncio.to_thread(store.put, url, bytes(data), content_type)
+
+
+async def fetch_thumbnail(url: str) -> Optional[str]:
+  """Name of the stored thumbnail of the image at the URL, downloading it once if needed."""
+  return get_thumbnail_store().lookup(url) or await thumbnail_flights.do(url, lambda: _download(url))
+
+
+async def proxy_image(urls: list[str]) -> str:
+  """Local URL of the first live, usable image among the candidates, "" if there is none.
+
+  An already stored first candidate is served without any request; otherwise all candidates are
+  checked concurrently and the live ones are tried in result order.
+  """
+  if not urls:
+    return ""
+  name = get_thumbnail_store().lookup(urls[0])
+  if name:
+    metrics.inc("learnie_image_proxy_total", {"outcome": "first"})
+    return f"{image_proxy_base_url()}/{name}"
+  alive = await asyncio.gather(*(is_alive(url) for url in urls))
+  for url in (url for url, ok in zip(urls, alive) if ok):
+    name = await fetch_thumbnail(url)
+    if name:
+      metrics.inc("learnie_image_proxy_total", {"outcome": "first" if url == urls[0] else "fallback"})
+      return f"{image_proxy_base_url()}/{name}"
+  metrics.inc("learnie_image_proxy_total", {"outcome": "unavailable"})
+  return ""
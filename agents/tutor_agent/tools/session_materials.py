@@ -0,0 +1,191 @@
+import json
+import re
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+from .image_cache import normalize_query
+from ..runtime.parsing import AgentOutputError, parse_agent_output
+from ..sub_agents.edu_materials_agent.types import Material
+
+# Session state layout: one entry per subtopic, so each new material only adds a small state delta.
+MATERIAL_OUTPUT_KEY = "last_material_output"
+MATERIAL_INDEX_KEY = "material_index"
+MATERIAL_KEY_PREFIX = "material:"
+
+# History parts longer than this are replaced with a short reference before the model call.
+COMPACT_THRESHOLD_CHARS = 1500
+DIGEST_BLOCK_CHARS = 240
+
+_REQUEST_FIELD = re.compile(r'^\s*(Topic|Section|Subtopic)\s*:\s*"?([^"\n]+)"?\s*$', re.MULTILINE | re.IGNORECASE)
+_TITLE = re.compile(r'"?title"?\s*:\s*"([^"]+)"')
+_FOREIGN_REPLY = re.compile(r"^\[([\w-]+)\] said: ", re.DOTALL)
+
+
+def material_key(topic: str, section: str, subtopic: str) -> str:
+  """Index key of a subtopic's material: normalized topic/section/subtopic titles."""
+  return "/".join(normalize_query(part) for part in (topic, section, subtopic))
+
+
+def material_digest(material: dict) -> dict:
+  """Compact version of a material: title, summary and the beginning of each block, without images."""
+  return {
+    "title": material.get("title", ""),
+    "summary": material.get("summary", ""),
+    "keyPoints": [
+      block.get("text", "")[:DIGEST_BLOCK_CHARS].rsplit(" ", 1)[0] + "…"
+      if len(block.get("text", "")) > DIGEST_BLOCK_CHARS else block.get("text", "")
+      for block in material.get("material", [])
+    ],
+  }
+
+
+def _request_fields(content: Optional[types.Content]) -> dict[str, str]:
+  text = "".join(part.text or "" for part in (content.parts if content else []) or [])
+  return {name.lower(): value.strip() for name, value in _REQUEST_FIELD.findall(text)}
+
+
+def store_material(state, topic: str, section: str, subtopic: str, material: dict) -> None:
+  """Adds a subtopic material to the session state index."""
+  key = material_key(topic, section, subtopic)
+  state[MATERIAL_KEY_PREFIX + key] = {
+    "topic": topic,
+    "section": section,
+    "subtopic": subtopic,
+    "material": material,
+    "digest": material_digest(material),
+  }
+  index = list(state.get(MATERIAL_INDEX_KEY, []))
+  if key not in index:
+    state[MATERIAL_INDEX_KEY] = index + [key]
+
+
+def remember_materials(callback_context: CallbackContext) -> None:
+  """after_agent_callback of `edu_materials_agent`: stores the generated material in the session state."""
+  output = callback_context.state.get(MATERIAL_OUTPUT_KEY)
+  if not output:
+    return None
+  try:
+    material = parse_agent_output(output, Material, callback_context.agent_name).model_dump()
+  except AgentOutputError:
+    return None
+
+  fields = _request_fields(callback_context.user_content)
+  subtopic = fields.get("subtopic") or material.get("title", "")
+  store_material(callback_context.state, fields.get("topic", ""), fields.get("section", ""), subtopic, material)
+  return None
+
+
+def _find_material(state, subtopic: str) -> Optional[dict]:
+  wanted = normalize_query(subtopic)
+  for key in reversed(state.get(MATERIAL_INDEX_KEY, [])):
+    if key == wanted or key.rsplit("/", 1)[-1] == wanted:
+      return state.get(MATERIAL_KEY_PREFIX + key)
+  return None
+
+
+def _mentioned_material(state, content: Optional[types.Content]) -> Optional[dict]:
+  fields = _request_fields(content)
+  if fields.get("subtopic"):
+    key = material_key(fields.get("topic", ""), fields.get("section", ""), fields["subtopic"])
+    return state.get(MATERIAL_KEY_PREFIX + key) or _find_material(state, fields["subtopic"])
+  # Whole titles only; the longest one wins, so "Synthetic Cubism" isn't taken for "Cubism".
+  text = f" {normalize_query(''.join(part.text or '' for part in (content.parts if content else []) or []))} "
+  mentioned = [
+    key for key in reversed(state.get(MATERIAL_INDEX_KEY, []))
+    if key.rsplit("/", 1)[-1] and f" {key.rsplit('/', 1)[-1]} " in text
+  ]
+  if not mentioned:
+    return None
+  return state.get(MATERIAL_KEY_PREFIX + max(mentioned, key=lambda key: len(key.rsplit("/", 1)[-1])))
+
+
+def add_material_context(callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+  """before_model_callback for agents without tools: adds the digest of the subtopic material mentioned
+  in the user request to the instructions."""
+  entry = _mentioned_material(callback_context.state, callback_context.user_content)
+  if entry:
+    llm_request.append_instructions([
+      f"Material of the subtopic '{entry['subtopic']}' generated in this session:\n{json.dumps(entry['digest'])}"
+    ])
+  return None
+
+
+def list_session_materials(tool_context: ToolContext):
+  """Lists the subtopics whose materials were already generated in this session.
+
+  Returns:
+      list of dicts with topic, section and subtopic fields
+  """
+  entries = (tool_context.state.get(MATERIAL_KEY_PREFIX + key) for key in tool_context.state.get(MATERIAL_INDEX_KEY, []))
+  return [
+    {"topic": entry["topic"], "section": entry["section"], "subtopic": entry["subtopic"]}
+    for entry in entries if entry
+  ]
+
+
+def get_material_digest(subtopic: str, tool_context: ToolContext):
+  """Returns a compact digest (summary and key points) of a subtopic's material generated in this session.
+
+  Args:
+      subtopic: The subtopic title
+
+  Returns:
+      dict with title, summary and keyPoints fields, or an error when no material was generated
+  """
+  entry = _find_material(tool_context.state, subtopic)
+  if not entry:
+    return {"error": f"No material for subtopic '{subtopic}' in this session."}
+  return entry["digest"]
+
+
+def _stored_titles(state) -> dict[str, str]:
+  """Normalized material and subtopic titles of the stored materials -> subtopic title."""
+  titles = {}
+  for key in state.get(MATERIAL_INDEX_KEY, []):
+    entry = state.get(MATERIAL_KEY_PREFIX + key)
+    if entry:
+      titles[normalize_query(entry["material"].get("title", ""))] = entry["subtopic"]
+      titles[normalize_query(entry["subtopic"])] = entry["subtopic"]
+  titles.pop("", None)
+  return titles
+
+
+def _compact_text(text: str, role: str, stored_titles: dict[str, str]) -> Optional[str]:
+  if len(text) <= COMPACT_THRESHOLD_CHARS:
+    return None
+  foreign = _FOREIGN_REPLY.match(text)
+  if role == "user" and not foreign:
+    return None
+  prefix = foreign.group(0) if foreign else ""
+  title = _TITLE.search(text)
+  if not title:
+    return f"{prefix}<{len(text)} characters omitted>"
+  subtopic = stored_titles.get(normalize_query(title.group(1)))
+  if subtopic is None:
+    # Not a stored material (e.g. the topic structure): the agents still need it as is.
+    return None
+  return (
+    f"{prefix}<material '{subtopic}' is stored in the session, "
+    f"call `get_material_digest` with this subtopic title to read it>"
+  )
+
+
+def compact_history(callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+  """before_model_callback: replaces long earlier outputs in the history with short references.
+
+  Materials stored in the session are replaced with a pointer to `get_material_digest`, long untitled
+  texts with their length; other JSON outputs such as the topic structure are kept. This keeps the
+  per-turn prompt size roughly constant as the session grows.
+  """
+  stored_titles = _stored_titles(callback_context.state)
+  for content in llm_request.contents[:-1]:
+    for part in content.parts or []:
+      if part.text:
+        compacted = _compact_text(part.text, content.role, stored_titles)
+        if compacted:
+          part.text = compacted
+  return None